@@ -1,6 +1,7 @@
 # Benchmark result processing;
 import sys
 import argparse
+import datetime
 import inspect
 import json
 import time
@@ -13,7 +14,7 @@ from collections import OrderedDict
 from elasticmagic import (
     Document, Field,
     SearchQuery,
-    MatchAll,
+    MatchAll, Bool,
     )
 from elasticmagic.result import SearchResult
 from elasticmagic.types import (
@@ -27,7 +28,8 @@ def setup():
     ap = argparse.ArgumentParser()
     sub = ap.add_subparsers(help='Valid commands')
     for command, setup, handler in [('sample', sample_setup, gen_sample),
-                                    ('run', run_setup, run)]:
+                                    ('run', run_setup, run),
+                                    ('compile', compile_setup, run_compile)]:
         sub_ap = sub.add_parser(command, help=handler.__doc__)
         sub_ap.set_defaults(action=handler)
         setup(sub_ap)
@@ -50,10 +52,14 @@ def sample_setup(ap):
                     choices=['all', 'hits', 'aggs'],
                     default='all',
                     help="Fields to generate.")
+    ap.add_argument('-d', '--doc', dest='doc',
+                    choices=['simple', 'lists'],
+                    default='simple',
+                    help="Document type of generated hits.")
 
 
 def run_setup(ap):
-    ap.add_argument('test', choices=['simple'], help="Test to run")
+    ap.add_argument('test', choices=['simple', 'lists'], help="Test to run")
     ap.add_argument('-i', '--input', dest='input',
                     type=argparse.FileType('r'), default=sys.stdin,
                     help="Input file")
@@ -61,6 +67,17 @@ def run_setup(ap):
                     action='store_true', default=False)
 
 
+def compile_setup(ap):
+    ap.add_argument('-n', '--filters', dest='filters',
+                    type=int, default=100,
+                    help="Number of term filters, default: 100")
+    ap.add_argument('-r', '--repeat', dest='repeat',
+                    type=int, default=1000,
+                    help="Number of compilations, default: 1000")
+    ap.add_argument('-p', '--profile', dest='profile',
+                    action='store_true', default=False)
+
+
 def main():
     ap = setup()
     options = ap.parse_args()
@@ -93,7 +110,7 @@ def gen_sample(options):
         return OrderedDict((
             ('total', options.size),
             ('max_score', 0),
-            ('hits', gen_simple_document(options.size)),
+            ('hits', gen_hits(options.size)),
             ))
 
     def aggs_gen():
@@ -105,6 +122,11 @@ def gen_sample(options):
                 },
             }
 
+    gen_hits = {
+        'simple': gen_simple_document,
+        'lists': gen_lists_document,
+    }[options.doc]
+
     hits = options.type in ['all', 'hits']
     aggs = options.type in ['all', 'aggs']
 
@@ -127,7 +149,8 @@ def run(options):
     prof = cProfile.Profile()
     cov = coverage.Coverage()
 
-    times = OrderedDict.fromkeys(['data_load', 'json_loads', 'searchResult'])
+    times = OrderedDict.fromkeys(
+        ['data_load', 'json_loads', 'searchResult', 'hits'])
     start = time.monotonic() * 1000
 
     raw_data = options.input.read()
@@ -137,21 +160,32 @@ def run(options):
     raw_results = json.loads(raw_data)
     times['json_loads'] = time.monotonic() * 1000 - start
 
+    doc_cls = {
+        'simple': SimpleDocument,
+        'lists': ListsDocument,
+    }[options.test]
     query = SearchQuery(MatchAll(),
-                        doc_cls=SimpleDocument)
+                        doc_cls=doc_cls)
     if 'aggregations' in raw_results:
-        query = query.aggs(terms=Terms(SimpleDocument.integer_0))
+        query = query.aggs(terms=Terms(doc_cls.integer_0))
     gc.disable()
     if options.profile:
         cov.start()
         prof.enable()
 
-    SearchResult(
+    start = time.monotonic() * 1000
+    result = SearchResult(
         raw_results,
         query._aggregations,
         doc_cls=query._get_doc_cls(),
         instance_mapper=query._instance_mapper)
     times['searchResult'] = time.monotonic() * 1000 - start
+    start = time.monotonic() * 1000
+
+    # hits are materialized lazily so touch every one of them
+    for _ in result.hits:
+        pass
+    times['hits'] = time.monotonic() * 1000 - start
     if options.profile:
         prof.disable()
         cov.stop()
@@ -166,6 +200,49 @@ def run(options):
         cov.html_report()
 
 
+def run_compile(options):
+    """Run query compilation benchmark."""
+    prof = cProfile.Profile()
+
+    # nested boolean filters like the ones generated by queryfilter
+    doc_cls = SimpleDocument
+    fields = [doc_cls.integer_0, doc_cls.integer_1, doc_cls.string_0]
+    filters = []
+    for i in range(options.filters):
+        field = fields[i % len(fields)]
+        filters.append(
+            Bool.should(
+                Bool.must(field == i, doc_cls.boolean_0 == bool(i % 2)),
+                field.in_([i, i + 1, i + 2]),
+            )
+        )
+    query = (
+        SearchQuery(MatchAll(), doc_cls=doc_cls)
+        .filter(Bool.must(*filters))
+        .aggs(terms=Terms(doc_cls.integer_0))
+        .order_by(doc_cls.date_0.desc())
+    )
+
+    gc.disable()
+    if options.profile:
+        prof.enable()
+
+    start = time.monotonic() * 1000
+    for _ in range(options.repeat):
+        query._compiler(query)
+    duration = time.monotonic() * 1000 - start
+
+    if options.profile:
+        prof.disable()
+    gc.enable()
+
+    print("Took compile {:10.3f}ms".format(duration))
+    print("Took per query {:10.3f}ms".format(duration / options.repeat))
+
+    if options.profile:
+        prof.print_stats('cumulative')
+
+
 class SimpleDocument(Document):
     __doc_type__ = 'simple'
 
@@ -230,8 +307,7 @@ def gen_terms_buckets(N):
             }
 
 
-def gen_lists_document(N):
-    K = len(N * .1)
+def gen_lists_document(N, K=10):
     for i in range(N):
         yield {
             '_index': _INDEX,
@@ -242,15 +318,22 @@ def gen_lists_document(N):
                 'integer_0': [i] * K,
                 'float_0': [(i / (10 ** len(str(i))))] * K,
                 'string_0': [str(i)] * K,
-                'date_0': None,
+                'date_0': [gen_date(i + a) for a in range(K)],
                 'boolean_1': [bool(1 + i % 2)] * K,
                 'integer_1': [-i] * K,
                 'float_1': [(i / (10 ** len(str(i))))] * K,
                 'string_1': [str(i)] * K,
-                'date_1': None,
+                'date_1': [gen_date(i, with_millis=True)] * K,
                 }
             }
 
 
+def gen_date(i, with_millis=False):
+    dt = datetime.datetime(2016, 1, 1) + datetime.timedelta(seconds=i * 37)
+    if with_millis:
+        return dt.strftime('%Y-%m-%dT%H:%M:%S.') + '{:03d}Z'.format(i % 1000)
+    return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
 if __name__ == '__main__':
     main()
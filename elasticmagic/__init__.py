@@ -1,13 +1,14 @@
-from .cluster import Cluster, MultiSearchError
+from .cluster import BulkRetry, Cluster, MultiSearchBatch, MultiSearchError
 from .document import Document, DynamicDocument
 from .expression import (
-    Params, Term, Terms, Exists, Missing, Match, MultiMatch, MatchAll, Range,
+    Params, Param, Term, Terms, Exists, Missing, Match, MultiMatch, MatchAll, Range,
     Bool, Query, DisMax, Filtered, Ids, Prefix, Limit,
     And, Or, Not, Sort, Boosting, Common, ConstantScore, FunctionScore,
     Field, SpanFirst, SpanMulti, SpanNear, SpanNot, SpanOr, SpanTerm, 
     Nested, HasParent, HasChild,
 )
 from .index import Index
+from .loader import InstanceLoader
 from .result import DelayedElasticsearchException
 from .search import SearchQuery, QueryRescorer
 from .types import ValidationError
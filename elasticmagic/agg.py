@@ -1,5 +1,7 @@
+from functools import partial
 from itertools import chain
 
+from .columns import FLOAT_TYPECODE, INT_TYPECODE, make_column
 from .document import DynamicDocument
 from .expression import ParamsExpression, Params
 from .compat import force_unicode
@@ -139,6 +141,18 @@ class TopHitsResult(AggResult):
         for hit in hits:
             hit.__dict__['instance'] = instances.get(hit._id)
 
+    def _iter_instance_populators(self, instance_mapper):
+        agg_results = self._mapper_registry.get(instance_mapper, [self])
+        for doc_cls, mapper in self._instance_mappers.items():
+            if mapper is not instance_mapper:
+                continue
+            is_pending = any(
+                isinstance(hit, doc_cls) and 'instance' not in hit.__dict__
+                for r in agg_results for hit in r.hits
+            )
+            if is_pending:
+                yield partial(self._populate_instances, doc_cls)
+
 
 class TopHits(MetricsAgg):
     __agg_name__ = 'top_hits'
@@ -253,53 +267,75 @@ class Cardinality(SingleValueMetricsAgg):
         )
 
 
+def _has_instance_mappers(aggs):
+    for agg_expr in aggs.values():
+        if getattr(agg_expr, '_instance_mapper', None):
+            return True
+        if isinstance(agg_expr, BucketAgg) and _has_instance_mappers(agg_expr._aggregations):
+            return True
+    return False
+
+
 class Bucket(object):
+    """Sub-aggregation results are built on first access.
+    """
     _typed_key = True
 
     def __init__(self, raw_data, agg_expr, parent, doc_cls_map=None, mapper_registry=None):
-        self.key = raw_data.get('key')
-        if self._typed_key:
-            self.key = agg_expr._type.to_python_single(self.key)
+        self.key = self._get_key(raw_data, agg_expr)
         self.doc_count = raw_data['doc_count']
         self.parent = parent
-        self.aggregations = {}
-        for agg_name, agg_expr in agg_expr._aggregations.items():
-            result_agg = agg_expr.build_agg_result(
-                raw_data[agg_name], doc_cls_map=doc_cls_map, mapper_registry=mapper_registry
-            )
-            self.aggregations[agg_name] = result_agg
+        self._raw_data = raw_data
+        self._agg_expr = agg_expr
+        self._doc_cls_map = doc_cls_map
+        self._mapper_registry = mapper_registry
+        self._aggregations = {}
+
+    @classmethod
+    def _get_key(cls, raw_data, agg_expr):
+        key = raw_data.get('key')
+        if cls._typed_key:
+            key = agg_expr._type.to_python_single(key)
+        return key
+
+    @cached_property
+    def aggregations(self):
+        return {
+            agg_name: self.get_aggregation(agg_name)
+            for agg_name in self._agg_expr._aggregations
+        }
 
     def get_aggregation(self, name):
-        return self.aggregations.get(name)
+        agg_result = self._aggregations.get(name)
+        if agg_result is None:
+            agg_expr = self._agg_expr._aggregations.get(name)
+            if agg_expr is None:
+                return None
+            agg_result = self._aggregations[name] = agg_expr.build_agg_result(
+                self._raw_data[name],
+                doc_cls_map=self._doc_cls_map, mapper_registry=self._mapper_registry
+            )
+        return agg_result
 
     @cached_property
     def instance(self):
-        self.parent._populate_instances()
-        return self.__dict__['instance']
+        if self.parent._instances is None:
+            self.parent._populate_instances()
+        return self.parent._instances.get(self.key)
 
 
 class MultiBucketAggResult(AggResult):
+    """Buckets are built on first access, :meth:`get_bucket` looks up
+    bucket keys computed from the raw data.
+    """
     bucket_cls = Bucket
 
     def __init__(self, agg_expr, raw_data, doc_cls_map, mapper_registry, instance_mapper):
         super(MultiBucketAggResult, self).__init__(agg_expr)
 
-        raw_buckets = raw_data.get('buckets', [])
-        if isinstance(raw_buckets, dict):
-            raw_buckets_map = raw_buckets
-            raw_buckets = []
-            for key, raw_bucket in sorted(raw_buckets_map.items(), key=lambda i: i[0]):
-                raw_bucket = raw_bucket.copy()
-                raw_bucket.setdefault('key', key)
-                raw_buckets.append(raw_bucket)
-
-        self._buckets = []
-        self._buckets_map = {}
-        for raw_bucket in raw_buckets:
-            bucket = self.bucket_cls(
-                raw_bucket, agg_expr, self, doc_cls_map=doc_cls_map, mapper_registry=mapper_registry
-            )
-            self.add_bucket(bucket)
+        self._raw_buckets = raw_data.get('buckets', [])
+        self._doc_cls_map = doc_cls_map
+        self._instances = None
 
         self._instance_mapper = instance_mapper
         if mapper_registry is None:
@@ -310,29 +346,123 @@ class MultiBucketAggResult(AggResult):
         if self._instance_mapper:
             self._mapper_registry.setdefault(self._instance_mapper, []).append(self)
 
+        if _has_instance_mappers(agg_expr._aggregations):
+            # instances of all nested results are fetched by single mapper call
+            # so they have to be registered before the first access
+            for bucket in self:
+                bucket.aggregations
+
+    @cached_property
+    def _raw_items(self):
+        # pairs of default key and raw bucket, keyed buckets are sorted by key
+        if isinstance(self._raw_buckets, dict):
+            return sorted(self._raw_buckets.items(), key=lambda i: i[0])
+        return [(None, raw_bucket) for raw_bucket in self._raw_buckets]
+
+    @cached_property
+    def _buckets(self):
+        return [None] * len(self._raw_items)
+
+    @cached_property
+    def _buckets_map(self):
+        return {
+            key: ix for ix, key in enumerate(self._iter_keys())
+            if key is not None
+        }
+
+    def _get_bucket(self, ix):
+        bucket = self._buckets[ix]
+        if bucket is None:
+            key, raw_bucket = self._raw_items[ix]
+            if key is not None and 'key' not in raw_bucket:
+                raw_bucket = dict(raw_bucket, key=key)
+            bucket = self._buckets[ix] = self.bucket_cls(
+                raw_bucket, self.expr, self,
+                doc_cls_map=self._doc_cls_map, mapper_registry=self._mapper_registry
+            )
+        return bucket
+
+    def _iter_keys(self):
+        for ix, bucket in enumerate(self._buckets):
+            if bucket is not None:
+                yield bucket.key
+            else:
+                key, raw_bucket = self._raw_items[ix]
+                if key is not None and 'key' not in raw_bucket:
+                    raw_bucket = {'key': key}
+                yield self.bucket_cls._get_key(raw_bucket, self.expr)
+
+    def _iter_raw_buckets(self):
+        raw_items = self._raw_items
+        for ix, bucket in enumerate(self._buckets):
+            if ix < len(raw_items):
+                yield raw_items[ix][1]
+            else:
+                yield bucket._raw_data
+
+    def to_columns(self, use_numpy=None):
+        """Returns dict of columns built from raw data without creating
+        buckets: ``key``, ``doc_count`` and values of every single value
+        metrics sub-aggregation, missing values are ``nan``.
+        Columns are numpy arrays when ``use_numpy`` is set or numpy is
+        installed, see :func:`elasticmagic.columns.make_column`.
+        """
+        metric_names = [
+            agg_name for agg_name, agg_expr in self.expr._aggregations.items()
+            if isinstance(agg_expr, SingleValueMetricsAgg)
+        ]
+        nan = float('nan')
+        doc_counts = []
+        metric_values = [[] for _ in metric_names]
+        for raw_bucket in self._iter_raw_buckets():
+            doc_counts.append(raw_bucket.get('doc_count'))
+            for agg_name, values in zip(metric_names, metric_values):
+                value = raw_bucket.get(agg_name, {}).get('value')
+                values.append(nan if value is None else float(value))
+
+        columns = {
+            'key': make_column(list(self._iter_keys()), use_numpy=use_numpy),
+            'doc_count': make_column(doc_counts, INT_TYPECODE, use_numpy=use_numpy),
+        }
+        for agg_name, values in zip(metric_names, metric_values):
+            columns[agg_name] = make_column(values, FLOAT_TYPECODE, use_numpy=use_numpy)
+        return columns
+
     def add_bucket(self, bucket):
         self._buckets.append(bucket)
-        if bucket.key is not None:
-            self._buckets_map[bucket.key] = bucket
+        if bucket.key is not None and '_buckets_map' in self.__dict__:
+            self._buckets_map[bucket.key] = len(self._buckets) - 1
 
     def get_bucket(self, key):
-        return self._buckets_map.get(key)
+        ix = self._buckets_map.get(key)
+        if ix is None:
+            return None
+        return self._get_bucket(ix)
 
     @property
     def buckets(self):
-        return list(self._buckets)
+        return list(self)
 
     def __iter__(self):
-        return iter(self._buckets)
+        for ix in range(len(self._buckets)):
+            yield self._get_bucket(ix)
 
     def _populate_instances(self):
-        buckets = list(chain(
-            *(a._buckets for a in self._mapper_registry.get(self._instance_mapper, [self]))
-        ))
-        keys = [bucket.key for bucket in buckets]
+        # results of lazily built sub-aggregations register later,
+        # already populated ones are skipped
+        agg_results = [
+            a for a in self._mapper_registry.get(self._instance_mapper, [self])
+            if a._instances is None
+        ]
+        keys = list(chain(*(a._iter_keys() for a in agg_results)))
         instances = self._instance_mapper(keys) if self._instance_mapper else {}
-        for bucket in buckets:
-            bucket.__dict__['instance'] = instances.get(bucket.key)
+        for a in agg_results:
+            a._instances = instances
+
+    def _iter_instance_populators(self, instance_mapper):
+        agg_results = self._mapper_registry.get(instance_mapper, [self])
+        if any(a._instances is None for a in agg_results):
+            yield self._populate_instances
 
 
 class MultiBucketAgg(BucketAgg):
@@ -417,8 +547,16 @@ class RangeBucket(Bucket):
         super(RangeBucket, self).__init__(raw_data, agg_expr, parent, doc_cls_map=doc_cls_map, mapper_registry=mapper_registry)
         self.from_ = agg_expr._type.to_python_single(raw_data.get('from'))
         self.to = agg_expr._type.to_python_single(raw_data.get('to'))
-        if self.key is None:
-            self.key = (self.from_, self.to)
+
+    @classmethod
+    def _get_key(cls, raw_data, agg_expr):
+        key = raw_data.get('key')
+        if key is None:
+            key = (
+                agg_expr._type.to_python_single(raw_data.get('from')),
+                agg_expr._type.to_python_single(raw_data.get('to')),
+            )
+        return key
 
 
 class RangeAggResult(MultiBucketAggResult):
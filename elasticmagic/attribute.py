@@ -1,4 +1,4 @@
-from .util import cached_property
+from .util import cached_property, make_key
 from .expression import Expression, Field, FieldOperators
 from .datastructures import OrderedAttributes
 
@@ -91,6 +91,12 @@ class AttributedField(Expression, FieldOperators):
         obj.__dict__[self._attr_name] = None
         return None
 
+    def _get_storage_name(self):
+        return self._attr_name
+
+    def _get_cache_key(self):
+        return (self.__class__, make_key(self._parent), self._field._name)
+
     def _collect_doc_classes(self):
         if isinstance(self._parent, AttributedField):
             return self._parent._collect_doc_classes()
@@ -103,6 +109,32 @@ class AttributedField(Expression, FieldOperators):
         return self._field._from_python(value)
 
 
+class CompactAttributedField(AttributedField):
+    """Attributed field that keeps document values in a slot.
+    """
+    def __init__(self, parent, attr_name, field, slot):
+        super(CompactAttributedField, self).__init__(parent, attr_name, field)
+        self._slot = slot
+
+    def _get_storage_name(self):
+        return self._slot.__name__
+
+    def __get__(self, obj, type=None):
+        if obj is None:
+            return self
+
+        try:
+            return self._slot.__get__(obj, type)
+        except AttributeError:
+            return None
+
+    def __set__(self, obj, value):
+        self._slot.__set__(obj, value)
+
+    def __delete__(self, obj):
+        self._slot.__delete__(obj)
+
+
 class DynamicAttributedField(AttributedField):
     def __getattr__(self, name):
         return getattr(
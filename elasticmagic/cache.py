@@ -0,0 +1,121 @@
+import json
+import time
+import hashlib
+import threading
+
+from .datastructures import LRUCache
+from .serializer import JSONSerializer
+
+
+_timer = getattr(time, 'monotonic', time.time)
+
+
+def make_search_key(query_fingerprint, params):
+    """Stable key of a search request, does not depend on dict ordering.
+    """
+    data = json.dumps(
+        [query_fingerprint, params], sort_keys=True, separators=(',', ':'),
+        default=JSONSerializer().default,
+    )
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Runs only one call per key at a time, concurrent callers
+    with the same key wait for it and share its result or error.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            self._wait(call)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _wait(self, call):
+        call.done.wait()
+
+
+class BaseResultCache(object):
+    """Interface of search result cache backends.
+
+    Values are raw Elasticsearch responses, a backend for an external store
+    should serialize them itself. ``ttl`` is in seconds, ``None`` means
+    backend default.
+    """
+
+    def get(self, key):
+        raise NotImplementedError()
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError()
+
+    def delete(self, key):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+
+class MemoryResultCache(BaseResultCache):
+    """In-process cache with LRU eviction and expiration.
+    Cached responses are shared between results and must not be modified.
+    """
+
+    def __init__(self, maxsize=1000, ttl=None, timer=_timer):
+        self.ttl = ttl
+        self._timer = timer
+        self._data = LRUCache(maxsize=maxsize)
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self._timer():
+            self._data.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl
+        expires_at = self._timer() + ttl if ttl is not None else None
+        self._data.set(key, (expires_at, value))
+
+    def delete(self, key):
+        self._data.delete(key)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -1,38 +1,177 @@
+import time
+import random
+import threading
 import collections
+from multiprocessing.pool import ThreadPool
 
 from elasticsearch import ElasticsearchException
 
+from .actions import Action, Index as IndexAction
+from .cache import SingleFlight, make_search_key
+from .compat import Queue, QueueFull
 from .compiler import DefaultCompiler
 from .util import clean_params
 from .index import Index
 from .search import SearchQuery
 from .result import (
-    BulkResult, CountResult, DeleteByQueryResult, DeleteResult, ExistsResult,
+    BulkResult, ClearScrollResult, CountResult, DeleteByQueryResult, DeleteResult, ExistsResult,
     FlushResult, RefreshResult, SearchResult,
 )
 from .document import Document, DynamicDocument
+from .events import RequestEvent
 from .expression import Params
+from .serializer import JSONSerializer
 
 
 MAX_RESULT_WINDOW = 10000
 
+BULK_CHUNK_SIZE = 500
+BULK_MAX_CHUNK_BYTES = 100 * 1024 * 1024
+
 
 class MultiSearchError(ElasticsearchException):
     pass
 
 
+class BulkRetry(object):
+    """Resubmits bulk actions that failed with retryable statuses.
+    Backoff grows exponentially with full jitter.
+    """
+    def __init__(
+            self, max_retries=3, initial_backoff=1.0, max_backoff=60.0,
+            statuses=(429, 503), jitter=True
+    ):
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+        self.jitter = jitter
+
+    def get_backoff(self, attempt):
+        backoff = min(self.max_backoff, self.initial_backoff * 2 ** attempt)
+        if self.jitter:
+            return random.uniform(0, backoff)
+        return backoff
+
+    def start(self, chunk, result):
+        return BulkRetryState(self, chunk, result)
+
+
+class BulkRetryState(object):
+    def __init__(self, retry, chunk, result):
+        self.retry = retry
+        self.chunk = chunk
+        self.attempts = [result]
+        self.items = list(result.items)
+        self._failed = self._get_failed(range(len(self.items)))
+
+    def _get_failed(self, indexes):
+        statuses = self.retry.statuses
+        return [ix for ix in indexes if self.items[ix].status in statuses]
+
+    def has_failed(self):
+        return bool(self._failed) and len(self.attempts) <= self.retry.max_retries
+
+    def get_backoff(self):
+        return self.retry.get_backoff(len(self.attempts) - 1)
+
+    def get_body(self):
+        return ''.join([self.chunk[ix] for ix in self._failed])
+
+    def add_result(self, result):
+        self.attempts.append(result)
+        for ix, item in zip(self._failed, result.items):
+            self.items[ix] = item
+        self._failed = self._get_failed(self._failed)
+
+    def get_result(self):
+        if len(self.attempts) == 1:
+            return self.attempts[0]
+        result = BulkResult({
+            'took': sum(r.took for r in self.attempts),
+            'errors': any(item.error is not None for item in self.items),
+            'items': [item.raw for item in self.items],
+        })
+        result.attempts = self.attempts
+        return result
+
+
+class _SliceDone(object):
+    def __init__(self, error=None):
+        self.error = error
+
+
+class MultiSearchBatch(object):
+    """Collects search queries and sends all of them as one multi search
+    request when a result of any pending query is requested::
+
+        with cluster.batch() as batch:
+            listing_sq, sidebar_sq = batch.add(listing_sq, sidebar_sq)
+            for doc in listing_sq.result:  # both queries are sent here
+                ...
+
+    Failed queries raise an error only when their result is accessed,
+    pass ``raise_on_error=True`` to raise on flush.
+    """
+    def __init__(self, cluster, raise_on_error=False, **kwargs):
+        self._cluster = cluster
+        self._multi_search_kwargs = dict(kwargs, raise_on_error=raise_on_error)
+        self._queries = []
+
+    def __enter__(self):
+        self._cluster._get_batches().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._cluster._get_batches().remove(self)
+        if exc_type is None:
+            self.flush()
+
+    def __contains__(self, q):
+        return any(p is q for p in self._queries)
+
+    def __len__(self):
+        return len(self._queries)
+
+    def add(self, *queries):
+        for q in queries:
+            if 'result' not in q.__dict__ and q not in self:
+                self._queries.append(q)
+        if len(queries) == 1:
+            return queries[0]
+        return queries
+
+    def flush(self):
+        queries, self._queries = self._queries, []
+        if not queries:
+            return []
+        return self._cluster.multi_search(queries, **self._multi_search_kwargs)
+
+
 class Cluster(object):
+    _search_query_cls = SearchQuery
+    _single_flight_cls = SingleFlight
+
     def __init__(
             self, client,
             multi_search_raise_on_error=True, compiler=None,
-            index_cls=None
+            index_cls=None, serializer=None, result_cache=None,
+            single_flight=False, listeners=None
     ):
         self._client = client
         self._multi_search_raise_on_error = multi_search_raise_on_error
         self._compiler = compiler or DefaultCompiler()
         self._index_cls = index_cls or Index
+        # when set request bodies are passed to the client as JSON strings
+        self._serializer = serializer
+        # raw search responses are cached when set, see cache.BaseResultCache
+        self._result_cache = result_cache
+        # identical concurrent searches share one request
+        self._single_flight = self._single_flight_cls() if single_flight else None
+        self._listeners = list(listeners or [])
 
         self._index_cache = {}
+        self._local = threading.local()
 
     def __getitem__(self, index_name):
         return self.get_index(index_name)
@@ -48,16 +187,93 @@ class Cluster(object):
     def get_client(self):
         return self._client
 
+    def batch(self, **kwargs):
+        """Returns :class:`MultiSearchBatch`, keyword arguments are passed
+        to :meth:`multi_search`.
+        """
+        return MultiSearchBatch(self, **kwargs)
+
+    def _get_batches(self):
+        batches = getattr(self._local, 'batches', None)
+        if batches is None:
+            batches = self._local.batches = []
+        return batches
+
+    def _find_batch(self, q):
+        for batch in reversed(self._get_batches()):
+            if q in batch:
+                return batch
+
+    def add_listener(self, listener):
+        """Adds :class:`elasticmagic.events.ClusterListener` that is
+        notified before and after every request.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def _start_request(self, operation):
+        if self._listeners:
+            return RequestEvent(operation)
+
+    def _before_request(self, event, params):
+        event._compiled(params)
+        for listener in self._listeners:
+            listener.before_request(event)
+
+    def _after_request(self, event):
+        for listener in self._listeners:
+            listener.after_request(event)
+
+    def _request_failed(self, event, error):
+        event._failed(error)
+        self._after_request(event)
+
+    def _request(self, event, params, send):
+        if event is None:
+            return send()
+        self._before_request(event, params)
+        try:
+            raw_result = send()
+        except Exception as e:
+            self._request_failed(event, e)
+            raise
+        event._sent(raw_result)
+        return raw_result
+
+    def _finish_request(self, event, make_result):
+        if event is None:
+            return make_result()
+        try:
+            result = make_result()
+        except Exception as e:
+            self._request_failed(event, e)
+            raise
+        event._finished(result)
+        self._after_request(event)
+        return result
+
+    def _dumps(self, body):
+        if self._serializer is None or body is None:
+            return body
+        return self._serializer.dumps(body)
+
+    def _dumps_lines(self, lines):
+        if self._serializer is None:
+            return lines
+        return self._serializer.dumps_lines(lines)
+
     def search_query(self, *args, **kwargs):
         kwargs['cluster'] = self
         kwargs.setdefault('_compiler', self._compiler.get_query_compiler())
-        return SearchQuery(*args, **kwargs)
+        return self._search_query_cls(*args, **kwargs)
 
     query = search_query
 
-    def get(self, index, id, doc_cls=None, doc_type=None, source=None,
-            realtime=None, routing=None, parent=None, preference=None,
-            refresh=None, version=None, version_type=None, **kwargs):
+    def _get_params(self, index, id, doc_cls=None, doc_type=None, source=None,
+                    realtime=None, routing=None, parent=None, preference=None,
+                    refresh=None, version=None, version_type=None, **kwargs):
         doc_cls = doc_cls or DynamicDocument
         doc_type = doc_type or getattr(doc_cls, '__doc_type__', None)
         params = clean_params({
@@ -71,14 +287,33 @@ class Cluster(object):
             'version': version,
             'version_type': version_type,
         }, **kwargs)
-        raw_doc = self._client.get(index=index, id=id, **params)
+        params['index'] = index
+        params['id'] = id
+        return doc_cls, params
+
+    def _get_result(self, doc_cls, raw_doc):
         return doc_cls(_hit=raw_doc)
 
+    def get(self, index, id, doc_cls=None, doc_type=None, source=None,
+            realtime=None, routing=None, parent=None, preference=None,
+            refresh=None, version=None, version_type=None, **kwargs):
+        event = self._start_request('get')
+        doc_cls, params = self._get_params(
+            index, id, doc_cls=doc_cls, doc_type=doc_type, source=source,
+            realtime=realtime, routing=routing, parent=parent,
+            preference=preference, refresh=refresh, version=version,
+            version_type=version_type, **kwargs
+        )
+        raw_result = self._request(event, params, lambda: self._client.get(**params))
+        return self._finish_request(
+            event, lambda: self._get_result(doc_cls, raw_result)
+        )
+
     # TODO: support ids
     # need way to know document class for id
-    def multi_get(self, docs, index=None, doc_type=None, source=None,
-                  parent=None, routing=None, preference=None, realtime=None,
-                  refresh=None, **kwargs):
+    def _multi_get_params(self, docs, index=None, doc_type=None, source=None,
+                          parent=None, routing=None, preference=None,
+                          realtime=None, refresh=None, **kwargs):
         params = clean_params({
             'index': index,
             'doc_type': doc_type,
@@ -95,7 +330,10 @@ class Cluster(object):
         for doc in docs:
             body['docs'].append(doc.to_meta())
             doc_classes.append(doc.__class__)
-        raw_result = self._client.mget(body=body, **params)
+        params['body'] = self._dumps(body)
+        return doc_classes, params
+
+    def _multi_get_result(self, doc_classes, raw_result):
         result_docs = []
         for doc_cls, raw_doc in zip(doc_classes, raw_result['docs']):
             if raw_doc['found']:
@@ -104,9 +342,23 @@ class Cluster(object):
                 result_docs.append(None)
         return result_docs
 
+    def multi_get(self, docs, index=None, doc_type=None, source=None,
+                  parent=None, routing=None, preference=None, realtime=None,
+                  refresh=None, **kwargs):
+        event = self._start_request('multi_get')
+        doc_classes, params = self._multi_get_params(
+            docs, index=index, doc_type=doc_type, source=source,
+            parent=parent, routing=routing, preference=preference,
+            realtime=realtime, refresh=refresh, **kwargs
+        )
+        raw_result = self._request(event, params, lambda: self._client.mget(**params))
+        return self._finish_request(
+            event, lambda: self._multi_get_result(doc_classes, raw_result)
+        )
+
     mget = multi_get
 
-    def search(
+    def _search_params(
             self, q, index=None, doc_type=None, routing=None, preference=None,
             timeout=None, search_type=None, query_cache=None,
             terminate_after=None, scroll=None, **kwargs
@@ -120,13 +372,77 @@ class Cluster(object):
                 'scroll': scroll,
             }, **kwargs)
         )
-        raw_result = self._client.search(body=q.to_dict(), **params)
+        params['body'] = self._dumps(q._compiled_params)
+        return params
+
+    def _search_key(self, q, params):
+        return make_search_key(
+            q.fingerprint(), {k: v for k, v in params.items() if k != 'body'}
+        )
+
+    def _search_cache_key(self, q, params):
+        if self._result_cache is None or not q._result_cache or params.get('scroll'):
+            return None
+        return self._search_key(q, params)
+
+    def _search_flight_key(self, q, params, cache_key=None):
+        # every scroll search must open its own scroll context
+        if self._single_flight is None or params.get('scroll'):
+            return None
+        return cache_key or self._search_key(q, params)
+
+    def _fetch_search(self, q, params):
+        cache_key = self._search_cache_key(q, params)
+        raw_result = self._get_cached_response(cache_key)
+        if raw_result is not None:
+            return raw_result
+        flight_key = self._search_flight_key(q, params, cache_key)
+        if flight_key is None:
+            return self._send_search(q, params, cache_key)
+        return self._single_flight.do(
+            flight_key, lambda: self._send_search(q, params, cache_key)
+        )
+
+    def _send_search(self, q, params, cache_key):
+        raw_result = self._client.search(**params)
+        self._cache_response(q, cache_key, raw_result)
+        return raw_result
+
+    def _get_cached_response(self, key):
+        if key is None:
+            return None
+        return self._result_cache.get(key)
+
+    def _cache_response(self, q, key, raw_result):
+        if key is None or raw_result.get('error') or raw_result.get('timed_out'):
+            return
+        self._result_cache.set(key, raw_result, ttl=q._result_cache_ttl)
+
+    def _search_result(self, q, raw_result):
         return SearchResult(
             raw_result, q._aggregations,
             doc_cls=q._get_doc_cls(), instance_mapper=q._instance_mapper,
         )
 
-    def count(self, q, index=None, doc_type=None, routing=None, preference=None, **kwargs):
+    def search(
+            self, q, index=None, doc_type=None, routing=None, preference=None,
+            timeout=None, search_type=None, query_cache=None,
+            terminate_after=None, scroll=None, **kwargs
+    ):
+        event = self._start_request('search')
+        params = self._search_params(
+            q, index=index, doc_type=doc_type, routing=routing,
+            preference=preference, timeout=timeout, search_type=search_type,
+            query_cache=query_cache, terminate_after=terminate_after,
+            scroll=scroll, **kwargs
+        )
+        raw_result = self._request(event, params, lambda: self._fetch_search(q, params))
+        return self._finish_request(
+            event, lambda: self._search_result(q, raw_result)
+        )
+
+    def _count_params(self, q, index=None, doc_type=None, routing=None,
+                      preference=None, **kwargs):
         body = {'query': q.to_dict()} if q else None
         params = clean_params({
             'index': index,
@@ -134,11 +450,20 @@ class Cluster(object):
             'routing': routing, 
             'preference': preference,
         }, **kwargs)
-        return CountResult(
-            self._client.count(body=body, **params)
+        params['body'] = self._dumps(body)
+        return params
+
+    def count(self, q, index=None, doc_type=None, routing=None, preference=None, **kwargs):
+        event = self._start_request('count')
+        params = self._count_params(
+            q, index=index, doc_type=doc_type, routing=routing,
+            preference=preference, **kwargs
         )
+        raw_result = self._request(event, params, lambda: self._client.count(**params))
+        return self._finish_request(event, lambda: CountResult(raw_result))
 
-    def exists(self, q, index=None, doc_type=None, refresh=None, routing=None, **kwargs):
+    def _exists_params(self, q, index=None, doc_type=None, refresh=None,
+                       routing=None, **kwargs):
         body = {'query': q.to_dict()} if q else None
         params = clean_params({
             'index': index, 
@@ -146,41 +471,213 @@ class Cluster(object):
             'refresh': refresh,
             'routing': routing,
         }, **kwargs)
-        return ExistsResult(
-            self._client.search_exists(body=body, **params)
+        params['body'] = self._dumps(body)
+        return params
+
+    def exists(self, q, index=None, doc_type=None, refresh=None, routing=None, **kwargs):
+        event = self._start_request('exists')
+        params = self._exists_params(
+            q, index=index, doc_type=doc_type, refresh=refresh,
+            routing=routing, **kwargs
+        )
+        raw_result = self._request(
+            event, params, lambda: self._client.search_exists(**params)
         )
+        return self._finish_request(event, lambda: ExistsResult(raw_result))
 
-    def scroll(self, scroll_id, scroll, doc_cls=None, instance_mapper=None, **kwargs):
+    def _scroll_params(self, scroll_id, scroll, **kwargs):
+        params = clean_params(kwargs)
+        params['scroll_id'] = scroll_id
+        params['scroll'] = scroll
+        return params
+
+    def _scroll_result(self, raw_result, doc_cls=None, instance_mapper=None):
         return SearchResult(
-            self._client.scroll(scroll_id=scroll_id, scroll=scroll, **clean_params(kwargs)),
+            raw_result,
             doc_cls=doc_cls,
             instance_mapper=instance_mapper,
         )
+
+    def scroll(self, scroll_id, scroll, doc_cls=None, instance_mapper=None, **kwargs):
+        event = self._start_request('scroll')
+        params = self._scroll_params(scroll_id, scroll, **kwargs)
+        raw_result = self._request(event, params, lambda: self._client.scroll(**params))
+        return self._finish_request(event, lambda: self._scroll_result(
+            raw_result, doc_cls=doc_cls, instance_mapper=instance_mapper,
+        ))
+
+    def clear_scroll(self, scroll_id, **kwargs):
+        event = self._start_request('clear_scroll')
+        params = clean_params(kwargs, scroll_id=scroll_id)
+        raw_result = self._request(
+            event, params, lambda: self._client.clear_scroll(**params)
+        )
+        return self._finish_request(event, lambda: ClearScrollResult(raw_result))
+
+    def scan(self, q, scroll='1m', prefetch=True, **kwargs):
+        """Iterates over all documents matched by the search query using
+        scroll. The next page is requested in background thread while
+        current one is consumed when ``prefetch`` is set. Scroll context is
+        cleared at the end of iteration or when the generator is closed.
+        """
+        result = self.search(q, scroll=scroll, **kwargs)
+        scroll_id = result.scroll_id
+        doc_cls = q._get_doc_cls()
+        pool = ThreadPool(1) if prefetch else None
+        next_page = None
+        try:
+            # first page of scan search type does not contain hits
+            first_page = True
+            while result.hits or (first_page and result.total):
+                first_page = False
+                if pool is not None:
+                    next_page = pool.apply_async(
+                        self.scroll, (scroll_id, scroll),
+                        {'doc_cls': doc_cls, 'instance_mapper': q._instance_mapper}
+                    )
+                for doc in result.hits:
+                    yield doc
+                if next_page is not None:
+                    result, next_page = next_page.get(), None
+                else:
+                    result = self.scroll(
+                        scroll_id, scroll,
+                        doc_cls=doc_cls, instance_mapper=q._instance_mapper
+                    )
+                scroll_id = result.scroll_id or scroll_id
+        finally:
+            if next_page is not None:
+                try:
+                    scroll_id = next_page.get().scroll_id or scroll_id
+                except Exception:
+                    pass
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            if scroll_id:
+                self.clear_scroll(scroll_id)
     
-    def multi_search(self, queries, index=None, doc_type=None, 
-                     routing=None, preference=None, search_type=None,
-                     raise_on_error=None, **kwargs):
-        params = clean_params({
+    def sliced_scan(self, q, slices, scroll='1m', callback=None,
+                    queue_size=1000, **kwargs):
+        """Scans ``slices`` slices of the search query concurrently, every
+        slice is scanned by its own thread. Without ``callback`` returns
+        iterator over documents of all slices in order of their arrival.
+        Otherwise calls ``callback(slice_query, docs)`` for every slice in
+        the slice thread and returns list of callback results.
+        """
+        slice_queries = [q.slice(slice_id, slices) for slice_id in range(slices)]
+        if callback is None:
+            return self._iter_sliced_scan(slice_queries, scroll, queue_size, kwargs)
+
+        pool = ThreadPool(slices)
+        try:
+            return pool.map(
+                lambda sq: callback(sq, self.scan(sq, scroll=scroll, **kwargs)),
+                slice_queries
+            )
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _iter_sliced_scan(self, slice_queries, scroll, queue_size, kwargs):
+        docs = Queue(queue_size)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    docs.put(item, timeout=0.1)
+                    return True
+                except QueueFull:
+                    pass
+            return False
+
+        def scan_slice(sq):
+            scan = self.scan(sq, scroll=scroll, **kwargs)
+            try:
+                for doc in scan:
+                    if not put(doc):
+                        break
+            except Exception as e:
+                put(_SliceDone(e))
+                return
+            finally:
+                scan.close()
+            put(_SliceDone())
+
+        pool = ThreadPool(len(slice_queries))
+        for sq in slice_queries:
+            pool.apply_async(scan_slice, (sq,))
+        try:
+            finished = 0
+            while finished < len(slice_queries):
+                doc = docs.get()
+                if isinstance(doc, _SliceDone):
+                    if doc.error is not None:
+                        # other slices are stopped and their scrolls cleared
+                        raise doc.error
+                    finished += 1
+                    continue
+                yield doc
+        finally:
+            stop.set()
+            pool.close()
+            pool.join()
+
+    def _multi_search_params(self, index=None, doc_type=None,
+                             routing=None, preference=None, search_type=None,
+                             **kwargs):
+        return clean_params({
             'index': index,
             'doc_type': doc_type,
             'routing': routing,
             'preference': preference,
             'search_type': search_type
         }, **kwargs)
+
+    def _multi_search_header(self, q):
+        query_header = {}
+        if q._index:
+            query_header['index'] = q._index._name
+        doc_type = q._get_doc_type()
+        if doc_type:
+            query_header['type'] = doc_type
+        query_header.update(q._search_params)
+        return query_header
+
+    def _multi_search_body(self, queries):
         body = []
         for q in queries:
-            query_header = {}
-            if q._index:
-                query_header['index'] = q._index._name
-            doc_type = q._get_doc_type()
-            if doc_type:
-                query_header['type'] = doc_type
-            query_header.update(q._search_params)
-            body += [query_header, q.to_dict()]
-
-        raw_results = self._client.msearch(body=body, **params)['responses']
+            body += [self._multi_search_header(q), q._compiled_params]
+        return self._dumps_lines(body)
+
+    def _multi_search_cached(self, queries, params):
+        """Returns cache keys and cached responses for the queries,
+        keys are the same as for single searches.
+        """
+        if self._result_cache is None:
+            return [None] * len(queries), [None] * len(queries)
+        cache_keys = []
+        for q in queries:
+            key_params = dict(params)
+            header = self._multi_search_header(q)
+            if 'type' in header:
+                key_params['doc_type'] = header.pop('type')
+            key_params.update(header)
+            cache_keys.append(self._search_cache_key(q, key_params))
+        return cache_keys, [self._get_cached_response(key) for key in cache_keys]
+
+    def _multi_search_merge(self, queries, cache_keys, responses, raw_results):
+        fetched = iter(raw_results['responses'])
+        for ix, q in enumerate(queries):
+            if responses[ix] is None:
+                raw_result = responses[ix] = next(fetched)
+                self._cache_response(q, cache_keys[ix], raw_result)
+        return {'responses': responses}
+
+    def _multi_search_result(self, queries, raw_results, raise_on_error=None):
         errors = []
-        for raw, q in zip(raw_results, queries):
+        for raw, q in zip(raw_results['responses'], queries):
             result = SearchResult(
                 raw, q._aggregations,
                 doc_cls=q._get_doc_cls(),
@@ -204,11 +701,37 @@ class Cluster(object):
 
         return [q.result for q in queries]
 
+    def multi_search(self, queries, index=None, doc_type=None, 
+                     routing=None, preference=None, search_type=None,
+                     raise_on_error=None, **kwargs):
+        event = self._start_request('multi_search')
+        params = self._multi_search_params(
+            index=index, doc_type=doc_type, routing=routing,
+            preference=preference, search_type=search_type, **kwargs
+        )
+        cache_keys, responses = self._multi_search_cached(queries, params)
+        missed = [q for q, raw in zip(queries, responses) if raw is None]
+        body = self._multi_search_body(missed)
+        raw_results = self._request(
+            event, dict(params, body=body),
+            lambda: (
+                self._client.msearch(body=body, **params)
+                if missed else {'responses': []}
+            )
+        )
+        return self._finish_request(event, lambda: self._multi_search_result(
+            queries,
+            self._multi_search_merge(queries, cache_keys, responses, raw_results),
+            raise_on_error=raise_on_error,
+        ))
+
     msearch = multi_search
 
-    def put_mapping(self, doc_cls_or_mapping, index, doc_type=None, allow_no_indices=None,
-                    expand_wildcards=None, ignore_conflicts=None, ignore_unavailable=None,
-                    master_timeout=None, timeout=None, **kwargs):
+    def _put_mapping_params(
+            self, doc_cls_or_mapping, index, doc_type=None, allow_no_indices=None,
+            expand_wildcards=None, ignore_conflicts=None, ignore_unavailable=None,
+            master_timeout=None, timeout=None, **kwargs
+    ):
         if issubclass(doc_cls_or_mapping, Document):
             mapping = doc_cls_or_mapping.to_mapping()
         else:
@@ -222,11 +745,27 @@ class Cluster(object):
             'master_timeout': master_timeout,
             'timeout': timeout,
         }, **kwargs)
-        return self._client.indices.put_mapping(
-            doc_type=doc_type, index=index, body=mapping, **params
+        params['doc_type'] = doc_type
+        params['index'] = index
+        params['body'] = mapping
+        return params
+
+    def put_mapping(self, doc_cls_or_mapping, index, doc_type=None, allow_no_indices=None,
+                    expand_wildcards=None, ignore_conflicts=None, ignore_unavailable=None,
+                    master_timeout=None, timeout=None, **kwargs):
+        event = self._start_request('put_mapping')
+        params = self._put_mapping_params(
+            doc_cls_or_mapping, index, doc_type=doc_type,
+            allow_no_indices=allow_no_indices, expand_wildcards=expand_wildcards,
+            ignore_conflicts=ignore_conflicts, ignore_unavailable=ignore_unavailable,
+            master_timeout=master_timeout, timeout=timeout, **kwargs
+        )
+        raw_result = self._request(
+            event, params, lambda: self._client.indices.put_mapping(**params)
         )
+        return self._finish_request(event, lambda: raw_result)
 
-    def delete(
+    def _delete_params(
             self, doc_or_id, index, doc_cls=None, doc_type=None,
             timeout=None, consistency=None, replication=None,
             parent=None, routing=None, refresh=None, version=None,
@@ -251,13 +790,31 @@ class Cluster(object):
             'version': version,
             'version_type': version_type,
         }, **kwargs)
-        return DeleteResult(
-            self._client.delete(id=doc_id, index=index, doc_type=doc_type, **params)
+        params['id'] = doc_id
+        params['index'] = index
+        params['doc_type'] = doc_type
+        return params
+
+    def delete(
+            self, doc_or_id, index, doc_cls=None, doc_type=None,
+            timeout=None, consistency=None, replication=None,
+            parent=None, routing=None, refresh=None, version=None,
+            version_type=None,
+            **kwargs
+    ):
+        event = self._start_request('delete')
+        params = self._delete_params(
+            doc_or_id, index, doc_cls=doc_cls, doc_type=doc_type,
+            timeout=timeout, consistency=consistency, replication=replication,
+            parent=parent, routing=routing, refresh=refresh, version=version,
+            version_type=version_type, **kwargs
         )
+        raw_result = self._request(event, params, lambda: self._client.delete(**params))
+        return self._finish_request(event, lambda: DeleteResult(raw_result))
 
-    def delete_by_query(self, q, index=None, doc_type=None,
-                        timeout=None, consistency=None, replication=None,
-                        routing=None, **kwargs):
+    def _delete_by_query_params(self, q, index=None, doc_type=None,
+                                timeout=None, consistency=None, replication=None,
+                                routing=None, **kwargs):
         params = clean_params({
             'index': index,
             'doc_type': doc_type,
@@ -266,13 +823,26 @@ class Cluster(object):
             'replication': replication,
             'routing': routing,
         }, **kwargs)
-        return DeleteByQueryResult(
-            self._client.delete_by_query(body=Params(query=q).to_dict(), **params)
+        params['body'] = self._dumps(Params(query=q).to_dict())
+        return params
+
+    def delete_by_query(self, q, index=None, doc_type=None,
+                        timeout=None, consistency=None, replication=None,
+                        routing=None, **kwargs):
+        event = self._start_request('delete_by_query')
+        params = self._delete_by_query_params(
+            q, index=index, doc_type=doc_type, timeout=timeout,
+            consistency=consistency, replication=replication, routing=routing,
+            **kwargs
         )
+        raw_result = self._request(
+            event, params, lambda: self._client.delete_by_query(**params)
+        )
+        return self._finish_request(event, lambda: DeleteByQueryResult(raw_result))
 
-    def bulk(self, actions, index=None, doc_type=None, refresh=None, 
-             timeout=None, consistency=None, replication=None, **kwargs):
-        params = clean_params({
+    def _bulk_params(self, index=None, doc_type=None, refresh=None, 
+                     timeout=None, consistency=None, replication=None, **kwargs):
+        return clean_params({
             'index': index,
             'doc_type': doc_type,
             'refresh': refresh,
@@ -280,18 +850,148 @@ class Cluster(object):
             'consistency': consistency,
             'replication': replication,
         }, **kwargs)
+
+    def _bulk_action_lines(self, act):
+        if not isinstance(act, Action):
+            # documents and raw dicts are indexed
+            act = IndexAction(act)
+        lines = [{act.__action_name__: act.get_meta()}]
+        source = act.get_source()
+        if source is not None:
+            lines.append(source)
+        return lines
+
+    def _bulk_body(self, acts):
         body = []
-        for act in actions:
-            body.append({act.__action_name__: act.get_meta()})
-            source = act.get_source()
-            if source is not None:
-                body.append(source)
-        return BulkResult(self._client.bulk(body=body, **params))
+        for act in acts:
+            body.extend(self._bulk_action_lines(act))
+        return self._dumps_lines(body)
+
+    def _get_bulk_serializer(self):
+        return self._serializer or JSONSerializer()
+
+    def _iter_bulk_chunks(self, acts, chunk_size, max_chunk_bytes):
+        serializer = self._get_bulk_serializer()
+        chunk = []
+        chunk_bytes = 0
+        for act in acts:
+            data = serializer.dumps_lines(self._bulk_action_lines(act))
+            data_bytes = len(data.encode('utf-8'))
+            if chunk and (
+                    len(chunk) >= chunk_size or
+                    chunk_bytes + data_bytes > max_chunk_bytes
+            ):
+                yield chunk
+                chunk = []
+                chunk_bytes = 0
+            chunk.append(data)
+            chunk_bytes += data_bytes
+        if chunk:
+            yield chunk
+
+    def bulk(self, actions, index=None, doc_type=None, refresh=None, 
+             timeout=None, consistency=None, replication=None, retry=None,
+             **kwargs):
+        params = self._bulk_params(
+            index=index, doc_type=doc_type, refresh=refresh,
+            timeout=timeout, consistency=consistency, replication=replication,
+            **kwargs
+        )
+        if retry is not None:
+            # actions are serialized one by one to be able to resend them
+            serializer = self._get_bulk_serializer()
+            chunk = [
+                serializer.dumps_lines(self._bulk_action_lines(act))
+                for act in actions
+            ]
+            return self._send_bulk_chunk(chunk, params, retry)
+        event = self._start_request('bulk')
+        return self._bulk_request(event, self._bulk_body(actions), params)
+
+    def streaming_bulk(
+            self, actions, chunk_size=BULK_CHUNK_SIZE,
+            max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+            index=None, doc_type=None, refresh=None,
+            timeout=None, consistency=None, replication=None, retry=None,
+            **kwargs
+    ):
+        """Consumes iterable of actions or documents lazily and sends them
+        in chunks limited by number of actions and serialized size.
+        Yields :class:`BulkResult` for every chunk. Failed actions are resent
+        according to ``retry`` (:class:`BulkRetry` instance).
+        """
+        params = self._bulk_params(
+            index=index, doc_type=doc_type, refresh=refresh,
+            timeout=timeout, consistency=consistency, replication=replication,
+            **kwargs
+        )
+        for chunk in self._iter_bulk_chunks(actions, chunk_size, max_chunk_bytes):
+            yield self._send_bulk_chunk(chunk, params, retry)
+
+    def parallel_bulk(
+            self, actions, concurrency=4, queue_size=4,
+            chunk_size=BULK_CHUNK_SIZE, max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+            index=None, doc_type=None, refresh=None,
+            timeout=None, consistency=None, replication=None, retry=None,
+            **kwargs
+    ):
+        """The same as :meth:`streaming_bulk` but chunks are sent by
+        ``concurrency`` threads. At most ``queue_size`` serialized chunks wait
+        for a free thread, results are yielded in order of the chunks.
+        """
+        params = self._bulk_params(
+            index=index, doc_type=doc_type, refresh=refresh,
+            timeout=timeout, consistency=consistency, replication=replication,
+            **kwargs
+        )
+        pool = ThreadPool(concurrency)
+        pending = collections.deque()
+        try:
+            for chunk in self._iter_bulk_chunks(actions, chunk_size, max_chunk_bytes):
+                if len(pending) >= concurrency + queue_size:
+                    yield pending.popleft().get()
+                pending.append(
+                    pool.apply_async(self._send_bulk_chunk, (chunk, params, retry))
+                )
+            while pending:
+                yield pending.popleft().get()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _bulk_request(self, event, body, params):
+        raw_result = self._request(
+            event, dict(params, body=body),
+            lambda: self._client.bulk(body=body, **params)
+        )
+        return self._finish_request(event, lambda: BulkResult(raw_result))
+
+    def _send_bulk_chunk(self, chunk, params, retry=None):
+        result = self._bulk_request(
+            self._start_request('bulk'), ''.join(chunk), params
+        )
+        if retry is None or not result.errors:
+            return result
+        state = retry.start(chunk, result)
+        while state.has_failed():
+            time.sleep(state.get_backoff())
+            state.add_result(self._bulk_request(
+                self._start_request('bulk'), state.get_body(), params
+            ))
+        return state.get_result()
 
     def refresh(self, index=None, **kwargs):
+        event = self._start_request('refresh')
         params = clean_params({'index': index}, **kwargs)
-        return RefreshResult(self._client.indices.refresh(**params))
+        raw_result = self._request(
+            event, params, lambda: self._client.indices.refresh(**params)
+        )
+        return self._finish_request(event, lambda: RefreshResult(raw_result))
 
     def flush(self, index=None, **kwargs):
+        event = self._start_request('flush')
         params = clean_params({'index': index}, **kwargs)
-        return FlushResult(self._client.indices.flush(**params))
+        raw_result = self._request(
+            event, params, lambda: self._client.indices.flush(**params)
+        )
+        return self._finish_request(event, lambda: FlushResult(raw_result))
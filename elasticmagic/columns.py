@@ -0,0 +1,80 @@
+from array import array
+
+from .compat import int_types
+from .types import Byte, Short, Integer, Long, Float, Double
+
+try:
+    import numpy
+    NUMPY_IMPORTED = True
+except ImportError:
+    NUMPY_IMPORTED = False
+
+
+try:
+    array('q')
+    INT_TYPECODE = 'q'
+except ValueError:
+    # python 2 has no long long arrays
+    INT_TYPECODE = 'l'
+FLOAT_TYPECODE = 'd'
+
+_NUMPY_DTYPES = {
+    INT_TYPECODE: 'int64',
+    FLOAT_TYPECODE: 'float64',
+}
+
+
+def get_typecode(field_type):
+    """Array typecode for values of the field type, ``None`` when values
+    cannot be packed.
+    """
+    if isinstance(field_type, (Byte, Short, Integer, Long)):
+        return INT_TYPECODE
+    if isinstance(field_type, (Float, Double)):
+        return FLOAT_TYPECODE
+    return None
+
+
+def _infer_typecode(values):
+    typecode = INT_TYPECODE
+    for v in values:
+        if isinstance(v, bool) or not isinstance(v, int_types + (float,)):
+            return None
+        if isinstance(v, float):
+            typecode = FLOAT_TYPECODE
+    return typecode
+
+
+def make_column(values, typecode=None, use_numpy=None):
+    """Packs list of values into :class:`array.array` or numpy array when
+    ``use_numpy`` is set, by default numpy is used if it is installed.
+    Values that do not fit an array are returned as list or as numpy array
+    of objects.
+    """
+    if use_numpy is None:
+        use_numpy = NUMPY_IMPORTED
+    if use_numpy:
+        if not NUMPY_IMPORTED:
+            raise ImportError('numpy is required for numpy columns')
+        if typecode is None:
+            typecode = _infer_typecode(values)
+        if typecode is not None:
+            try:
+                return numpy.array(values, dtype=_NUMPY_DTYPES[typecode])
+            except (TypeError, ValueError, OverflowError):
+                pass
+        # filled one by one so tuples and lists are not turned into
+        # another dimension
+        column = numpy.empty(len(values), dtype=object)
+        for ix, value in enumerate(values):
+            column[ix] = value
+        return column
+
+    if typecode is None:
+        typecode = _infer_typecode(values)
+        if typecode is None:
+            return values
+    try:
+        return array(typecode, values)
+    except (TypeError, OverflowError):
+        return values
@@ -18,9 +18,13 @@ else:
 if PY2:
     from itertools import izip as zip
     from itertools import izip_longest as zip_longest
+    from Queue import Queue, Full as QueueFull
+    from collections import Sequence
 else:
     zip = zip
     from itertools import zip_longest
+    from queue import Queue, Full as QueueFull
+    from collections.abc import Sequence
 
 
 def force_unicode(value):
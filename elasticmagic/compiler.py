@@ -1,11 +1,14 @@
+import copy
 import operator
 import collections
 
+from .compat import int_types, string_types
 from .expression import Bool
 from .expression import Params
 from .expression import Filtered
 from .expression import FunctionScore
 from .expression import HighlightedField
+from .expression import Param
 
 
 OPERATORS = {
@@ -14,6 +17,14 @@ OPERATORS = {
 }
 
 
+# marks values that are compiled as is
+_VISIT_VALUE = object()
+# values of these types are not visited at all
+_SCALAR_TYPES = frozenset(
+    string_types + int_types + (float, bool, type(None))
+)
+
+
 class CompilationError(Exception):
     pass
 
@@ -21,9 +32,58 @@ class CompilationError(Exception):
 class Compiled(object):
     def __init__(self, expression):
         self.expression = expression
+        self._dispatch_table = self._get_dispatch_table()
         self.params = self.visit(self.expression)
 
+    @classmethod
+    def _get_dispatch_table(cls):
+        # maps expression class to unbound visitor function,
+        # every compiled class has its own table
+        table = cls.__dict__.get('_dispatch_table_cache')
+        if table is None:
+            table = cls._dispatch_table_cache = {}
+        return table
+
+    @classmethod
+    def _resolve_visit_func(cls, expr_cls):
+        if issubclass(expr_cls, type):
+            # classes (for instance documents) carry visit name themselves
+            return None
+
+        visit_name = getattr(expr_cls, '__visit_name__', None)
+        if visit_name:
+            if not isinstance(visit_name, string_types):
+                # visit name depends on instance
+                return None
+            return getattr(cls, 'visit_{}'.format(visit_name))
+
+        if issubclass(expr_cls, dict):
+            return cls.visit_dict
+
+        if issubclass(expr_cls, (list, tuple)):
+            return cls.visit_list
+
+        return _VISIT_VALUE
+
     def visit(self, expr, **kwargs):
+        expr_cls = expr.__class__
+        try:
+            visit_func = self._dispatch_table[expr_cls]
+        except KeyError:
+            visit_func = self._resolve_visit_func(expr_cls)
+            # python 2 creates new unbound method on every access
+            visit_func = self._dispatch_table[expr_cls] = \
+                getattr(visit_func, '__func__', visit_func)
+
+        if visit_func is _VISIT_VALUE:
+            return expr
+        if visit_func is None:
+            return self._visit_dynamic(expr, **kwargs)
+        if kwargs:
+            return visit_func(self, expr, **kwargs)
+        return visit_func(self, expr)
+
+    def _visit_dynamic(self, expr, **kwargs):
         visit_name = None
         if hasattr(expr, '__visit_name__'):
             visit_name = expr.__visit_name__
@@ -41,16 +101,29 @@ class Compiled(object):
         return expr
 
     def visit_params(self, params):
-        res = {}
-        for k, v in params.items():
-            res[self.visit(k)] = self.visit(v)
-        return res
+        return self.visit_dict(params)
+
+    def visit_param(self, param):
+        # parameters are left in place to be bound by the template
+        return param
 
     def visit_dict(self, dct):
-        return {self.visit(k): self.visit(v) for k, v in dct.items()}
+        visit = self.visit
+        res = {}
+        for k, v in dct.items():
+            if k.__class__ not in _SCALAR_TYPES:
+                k = visit(k)
+            if v.__class__ not in _SCALAR_TYPES:
+                v = visit(v)
+            res[k] = v
+        return res
 
     def visit_list(self, lst):
-        return [self.visit(v) for v in lst]
+        visit = self.visit
+        return [
+            v if v.__class__ in _SCALAR_TYPES else visit(v)
+            for v in lst
+        ]
 
 
 class ExpressionCompiled(Compiled):
@@ -342,6 +415,10 @@ class QueryCompiled(ExpressionCompiled):
             params['size'] = query_context.limit
         if query_context.offset is not None:
             params['from'] = query_context.offset
+        if query_context.slice:
+            params['slice'] = self.visit(query_context.slice)
+        if query_context.search_after:
+            params['search_after'] = self.visit(query_context.search_after)
         if query_context.rescores:
             params['rescore'] = self.visit(query_context.rescores)
         if query_context.suggest:
@@ -432,6 +509,68 @@ class MappingCompiled(Compiled):
         }
 
 
+class Template(object):
+    """Compiled expression with :class:`Param` placeholders. Binding copies
+    only containers on the way to the placeholders, the rest of the compiled
+    body is shared between bound results so it must not be modified.
+    """
+
+    def __init__(self, params):
+        self.params = params
+        self._placeholders = []
+        self._collect_placeholders(params, ())
+
+    def _collect_placeholders(self, value, path):
+        if isinstance(value, Param):
+            self._placeholders.append((path, value))
+        elif isinstance(value, dict):
+            for k, v in value.items():
+                self._collect_placeholders(v, path + (k,))
+        elif isinstance(value, list):
+            for i, v in enumerate(value):
+                self._collect_placeholders(v, path + (i,))
+
+    @property
+    def param_names(self):
+        return set(param.name for _, param in self._placeholders)
+
+    def bind(self, **values):
+        if not self._placeholders:
+            return copy.deepcopy(self.params)
+        if not self._placeholders[0][0]:
+            return self._get_value(self._placeholders[0][1], values)
+
+        root = self._copy(self.params)
+        copies = {(): root}
+        for path, param in self._placeholders:
+            container = root
+            for depth in range(1, len(path)):
+                prefix = path[:depth]
+                copied = copies.get(prefix)
+                if copied is None:
+                    copied = copies[prefix] = self._copy(container[path[depth - 1]])
+                    container[path[depth - 1]] = copied
+                container = copied
+            container[path[-1]] = self._get_value(param, values)
+        return root
+
+    @staticmethod
+    def _copy(container):
+        if isinstance(container, dict):
+            return dict(container)
+        return list(container)
+
+    @staticmethod
+    def _get_value(param, values):
+        if param.name in values:
+            return values[param.name]
+        if param.required:
+            raise CompilationError(
+                'Missing value for parameter: {}'.format(param.name)
+            )
+        return param.default
+
+
 class Compiler(object):
     def get_expression_compiler(self):
         raise NotImplementedError()
@@ -2,7 +2,10 @@ import fnmatch
 
 from .types import Type, String, Integer, Float, Date, ValidationError
 from .compiler import DefaultCompiler
-from .attribute import AttributedField, DynamicAttributedField, _attributed_field_factory
+from .attribute import (
+    AttributedField, CompactAttributedField, DynamicAttributedField,
+    _attributed_field_factory,
+)
 from .expression import Field, MappingField
 from .datastructures import OrderedAttributes
 from .util import cached_property
@@ -20,6 +23,8 @@ META_FIELD_NAMES = {
     '_version',
 }
 
+COMPACT_SLOT_PREFIX = '_slot_'
+
 
 class DocumentMeta(type):
     def __new__(meta, name, bases, dct):
@@ -32,6 +37,7 @@ class DocumentMeta(type):
         cls._mapping_fields = OrderedAttributes()
         cls._dynamic_fields = OrderedAttributes()
         cls._field_name_map = {}
+        cls._source_decoder = None
 
         process_fields = []
 
@@ -62,6 +68,29 @@ class DocumentMeta(type):
             dynamic_defaults[dyn_field.get_name()] = default
         return dynamic_defaults
 
+    def _get_source_decoder(cls):
+        if cls._source_decoder is None:
+            cls._source_decoder = cls._build_source_decoder()
+            # overridden hook disables the decoder
+            cls._process_source_overridden = (
+                _get_func(cls._process_source_key_value) is not
+                _get_func(Document._process_source_key_value)
+            )
+        return cls._source_decoder
+
+    def _build_source_decoder(cls):
+        mapping_keys = [
+            (attr_field._get_storage_name(), attr_field._field._name)
+            for attr_field in cls._mapping_fields
+        ]
+        source_decoders = {
+            field_name: (
+                attr_field._get_storage_name(), attr_field.get_type().to_python
+            )
+            for field_name, attr_field in cls._field_name_map.items()
+        }
+        return mapping_keys, source_decoders, None
+
     def __setattr__(cls, name, value):
         if isinstance(value, Field):
             is_mapping = (
@@ -77,7 +106,13 @@ class DocumentMeta(type):
             if field._name is None:
                 field._name = name
 
-            attr_field = AttributedField(cls, name, field)
+            slot = None
+            if cls.__dict__.get('__compact__'):
+                slot = cls.__dict__.get(COMPACT_SLOT_PREFIX + name)
+            if slot is not None:
+                attr_field = CompactAttributedField(cls, name, field, slot)
+            else:
+                attr_field = AttributedField(cls, name, field)
 
             if is_mapping:
                 cls._mapping_fields[name] = attr_field
@@ -85,6 +120,9 @@ class DocumentMeta(type):
                 cls._user_fields[name] = attr_field
             cls._fields[name] = attr_field
             cls._field_name_map[field._name] = attr_field
+            cls._source_decoder = None
+            # compact class has no slot for the new field
+            cls._compact_cls = None
 
             value = attr_field
 
@@ -109,6 +147,25 @@ class DocumentMeta(type):
     def wildcard(cls, name):
         return DynamicAttributedField(cls, name, Field(name))
 
+    def get_compact_cls(cls):
+        if cls.__dict__.get('__compact__'):
+            return cls
+        compact_cls = cls.__dict__.get('_compact_cls')
+        if compact_cls is None:
+            slots = [COMPACT_SLOT_PREFIX + attr_name for attr_name in cls._fields.keys()]
+            slots.extend(['_hit_fields', '_highlight', '_result'])
+            compact_cls = type(cls)(
+                'Compact{}'.format(cls.__name__),
+                (_CompactDocument, cls),
+                {
+                    '__module__': cls.__module__,
+                    '__slots__': tuple(slots),
+                    '__compact__': True,
+                }
+            )
+            cls._compact_cls = compact_cls
+        return compact_cls
+
     def __getattr__(cls, name):
         return getattr(cls.fields, name)
 
@@ -142,12 +199,24 @@ class Document(with_metaclass(DocumentMeta)):
         self._hit_fields = None
         self._highlight = None
         if _hit:
-            self._score = _hit.get('_score')
-            for attr_field in self._mapping_fields:
-                setattr(self, attr_field._attr_name, _hit.get(attr_field._field._name))
-            if _hit.get('_source'):
-                for hit_key, hit_value in _hit['_source'].items():
+            mapping_keys, source_decoders, default_decoder = \
+                self.__class__._get_source_decoder()
+            for attr_name, hit_key in mapping_keys:
+                setattr(self, attr_name, _hit.get(hit_key))
+            source = _hit.get('_source')
+            if source and self.__class__._process_source_overridden:
+                for hit_key, hit_value in source.items():
                     setattr(self, *self._process_source_key_value(hit_key, hit_value))
+            elif source:
+                for hit_key, hit_value in source.items():
+                    decoder = source_decoders.get(hit_key)
+                    if decoder is not None:
+                        attr_name, to_python = decoder
+                        setattr(self, attr_name, to_python(hit_value))
+                    elif default_decoder is not None:
+                        setattr(self, hit_key, default_decoder(hit_value))
+                    else:
+                        setattr(self, hit_key, hit_value)
             if _hit.get('fields'):
                 # we cannot construct document from fields
                 # in next example we cannot decide which tag has name and which has not:
@@ -162,9 +231,14 @@ class Document(with_metaclass(DocumentMeta)):
         self._result = _result
 
     def _process_source_key_value(self, key, value):
-        if key in self._field_name_map:
-            attr_field = self._field_name_map[key]
-            return attr_field._attr_name, attr_field._to_python(value)
+        _, source_decoders, default_decoder = \
+            self.__class__._get_source_decoder()
+        decoder = source_decoders.get(key)
+        if decoder is not None:
+            attr_name, to_python = decoder
+            return attr_name, to_python(value)
+        if default_decoder is not None:
+            return key, default_decoder(value)
         return key, value
 
     def _process_fields(self, hit_fields):
@@ -196,9 +270,12 @@ class Document(with_metaclass(DocumentMeta)):
                 doc_meta[field_name] = value
         return doc_meta
     
+    def _iter_attr_values(self):
+        return iter(self.__dict__.items())
+
     def to_source(self, validate=False):
         res = {}
-        for key, value in self.__dict__.items():
+        for key, value in self._iter_attr_values():
             if key in self.__class__.mapping_fields:
                 continue
 
@@ -239,6 +316,25 @@ class Document(with_metaclass(DocumentMeta)):
             return self.__dict__['instance']
 
 
+class _CompactDocument(object):
+    """Mixin for the generated classes returned by
+    :meth:`DocumentMeta.get_compact_cls`. Field values are stored in slots,
+    instance ``__dict__`` is only created for unknown attributes.
+    """
+    __slots__ = ()
+
+    def _iter_attr_values(self):
+        for attr_field in self.__class__._fields.values():
+            if isinstance(attr_field, CompactAttributedField):
+                try:
+                    value = attr_field._slot.__get__(self)
+                except AttributeError:
+                    continue
+                yield attr_field._attr_name, value
+        for key_value in self.__dict__.items():
+            yield key_value
+
+
 class DynamicDocumentMeta(DocumentMeta):
     def _get_dynamic_defaults(cls):
         dynamic_defaults = super(DynamicDocumentMeta, cls)._get_dynamic_defaults()
@@ -246,14 +342,35 @@ class DynamicDocumentMeta(DocumentMeta):
             dynamic_defaults['*'] = _attributed_field_factory(DynamicAttributedField, cls, Field('*'))
         return dynamic_defaults
 
+    def _build_source_decoder(cls):
+        mapping_keys, source_decoders, _ = \
+            super(DynamicDocumentMeta, cls)._build_source_decoder()
+        source_decoders = {
+            field_name: (attr_name, _wrap_dict_decoder(to_python))
+            for field_name, (attr_name, to_python) in source_decoders.items()
+        }
+        return mapping_keys, source_decoders, _decode_dynamic_value
+
     def __getattr__(cls, name):
         return cls.fields[name]
 
 
 class DynamicDocument(with_metaclass(DynamicDocumentMeta, Document)):
-    def _process_source_key_value(self, key, value):
-        key, value = super(DynamicDocument, self)._process_source_key_value(key, value)
-        if isinstance(value, dict):
-            return key, DynamicDocument(**value)
-        return key, value
+    pass
+
+
+def _get_func(method):
+    return getattr(method, '__func__', method)
+
+
+def _decode_dynamic_value(value):
+    if isinstance(value, dict):
+        return DynamicDocument(**value)
+    return value
+
+
+def _wrap_dict_decoder(to_python):
+    def decode(value):
+        return _decode_dynamic_value(to_python(value))
+    return decode
 
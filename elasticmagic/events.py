@@ -0,0 +1,111 @@
+import time
+
+from .compat import string_types
+
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+class RequestEvent(object):
+    """Describes a single request to Elasticsearch made by a cluster.
+
+    Phases are timed in seconds: ``compile_time`` covers building and
+    serializing of the request, ``transport_time`` covers the client call
+    including decoding of the response, ``result_time`` covers building of
+    the result object. Not finished phases are ``None``.
+    """
+
+    def __init__(self, operation, timer=_timer):
+        self.operation = operation
+        self.params = None
+        self.raw_result = None
+        self.result = None
+        self.error = None
+        self.compile_time = None
+        self.transport_time = None
+        self.result_time = None
+        self._timer = timer
+        self._last_time = timer()
+
+    def _elapsed(self):
+        now = self._timer()
+        elapsed, self._last_time = now - self._last_time, now
+        return elapsed
+
+    def _compiled(self, params):
+        self.params = params
+        self.compile_time = self._elapsed()
+
+    def _sent(self, raw_result):
+        self.raw_result = raw_result
+        self.transport_time = self._elapsed()
+
+    def _failed(self, error):
+        self.error = error
+        if self.transport_time is None:
+            self.transport_time = self._elapsed()
+        else:
+            self.result_time = self._elapsed()
+
+    def _finished(self, result):
+        self.result = result
+        self.result_time = self._elapsed()
+
+    @property
+    def duration(self):
+        return sum(
+            t for t in (self.compile_time, self.transport_time, self.result_time)
+            if t is not None
+        )
+
+    @property
+    def request_size(self):
+        """Size of serialized request body, ``None`` when the body is
+        serialized by the client.
+        """
+        body = self.params.get('body') if self.params else None
+        if isinstance(body, string_types):
+            return len(body.encode('utf-8'))
+        return None
+
+    @property
+    def took(self):
+        if isinstance(self.raw_result, dict):
+            took = self.raw_result.get('took')
+            if took is None and 'responses' in self.raw_result:
+                return sum(r.get('took', 0) for r in self.raw_result['responses'])
+            return took
+
+    @property
+    def hits_count(self):
+        """Number of returned hits or bulk items."""
+        if not isinstance(self.raw_result, dict):
+            return None
+        if 'hits' in self.raw_result:
+            return len(self.raw_result['hits']['hits'])
+        if 'responses' in self.raw_result:
+            return sum(
+                len(r['hits']['hits'])
+                for r in self.raw_result['responses'] if 'hits' in r
+            )
+        if 'items' in self.raw_result:
+            return len(self.raw_result['items'])
+        if 'docs' in self.raw_result:
+            return len(self.raw_result['docs'])
+        return None
+
+
+class ClusterListener(object):
+    """Base class for listeners passed to
+    :meth:`Cluster.add_listener <elasticmagic.cluster.Cluster.add_listener>`.
+    Listeners are called in the thread that makes the request.
+    """
+
+    def before_request(self, event):
+        pass
+
+    def after_request(self, event):
+        """Called when the result is built or the request failed,
+        see ``event.error``.
+        """
+        pass
@@ -4,12 +4,15 @@ import operator
 import collections
 from itertools import chain, count
 
-from .util import clean_params, collect_doc_classes
+from .util import clean_params, collect_doc_classes, fingerprint, make_key
 from .types import instantiate, Type
 from .compat import string_types
 
 
 class Expression(object):
+    # memoized values, they are not a part of the expression
+    _MEMO_ATTRS = frozenset(['_cache_key', '_fingerprints'])
+
     def _collect_doc_classes(self):
         return set()
 
@@ -22,6 +25,32 @@ class Expression(object):
     def to_dict(self, compiler=None):
         return self.compile(compiler=compiler).params
 
+    def fingerprint(self, normalize=False):
+        """Canonical hash of the compiled expression,
+        see :func:`elasticmagic.util.fingerprint`.
+        """
+        fingerprints = self.__dict__.get('_fingerprints')
+        if fingerprints is None:
+            fingerprints = self._fingerprints = {}
+        if normalize not in fingerprints:
+            fingerprints[normalize] = fingerprint(self.to_dict(), normalize=normalize)
+        return fingerprints[normalize]
+
+    def _get_cache_key(self):
+        # expressions are immutable so the key is computed only once,
+        # queries that share sub-expressions do not walk them again
+        key = self.__dict__.get('_cache_key')
+        if key is None:
+            key = (
+                self.__class__,
+                make_key({
+                    k: v for k, v in self.__dict__.items()
+                    if k not in self._MEMO_ATTRS
+                })
+            )
+            self._cache_key = key
+        return key
+
 
 class Literal(object):
     __visit_name__ = 'literal'
@@ -59,6 +88,28 @@ class Params(Expression, collections.Mapping):
     def __contains__(self, key):
         return key in self._params
 
+    def items(self):
+        return self._params.items()
+
+
+class Param(Expression):
+    """Named placeholder that is substituted when a compiled template is bound.
+    Parameters without default value are required.
+    """
+    __visit_name__ = 'param'
+
+    NO_DEFAULT = object()
+
+    def __init__(self, name, default=NO_DEFAULT):
+        self.name = name
+        self.default = default
+
+    @property
+    def required(self):
+        return self.default is self.NO_DEFAULT
+
+    def __repr__(self):
+        return '<Param: {}>'.format(self.name)
 
 
 class ParamsExpression(Expression):
@@ -121,7 +172,7 @@ class Terms(FieldExpression):
         super(Terms, self).__init__(
             field, minimum_should_match=minimum_should_match, boost=boost, **kwargs
         )
-        self.terms = list(terms)
+        self.terms = terms if isinstance(terms, Param) else list(terms)
 
 
 class Match(FieldQueryExpression):
@@ -533,6 +584,9 @@ class Field(Expression, FieldOperators):
         self._count = kwargs.pop('_counter', next(self._counter))
         self._mapping_options = kwargs
 
+    def _get_cache_key(self):
+        return (self.__class__, self._name)
+
     def clone(self, cls=None):
         cls = cls or self.__class__
         assert issubclass(cls, Field)
@@ -0,0 +1,3 @@
+# requires python 3.6+
+from .cluster import AsyncCluster, AsyncIndex
+from .search import AsyncSearchQuery
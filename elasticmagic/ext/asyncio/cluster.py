@@ -0,0 +1,334 @@
+import asyncio
+import collections
+
+from ...cluster import BULK_CHUNK_SIZE, BULK_MAX_CHUNK_BYTES, Cluster, _SliceDone
+from ...index import Index
+from ...result import (
+    BulkResult, ClearScrollResult, CountResult, DeleteByQueryResult, DeleteResult, ExistsResult,
+    FlushResult, RefreshResult,
+)
+from ...util import clean_params
+from .search import AsyncSearchQuery
+
+
+class AsyncSingleFlight(object):
+    """Awaits only one coroutine per key at a time, concurrent callers
+    with the same key share its result.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn):
+        fut = self._calls.get(key)
+        if fut is None:
+            fut = self._calls[key] = asyncio.ensure_future(fn())
+            fut.add_done_callback(lambda _: self._calls.pop(key, None))
+        # cancelled caller must not cancel the shared call
+        return await asyncio.shield(fut)
+
+
+class AsyncIndex(Index):
+    """Index of :class:`AsyncCluster`, methods that do requests
+    return awaitables.
+    """
+
+
+class AsyncCluster(Cluster):
+    """Cluster for asynchronous client which methods return awaitables,
+    for example ``elasticsearch_async.AsyncElasticsearch``.
+    """
+    _search_query_cls = AsyncSearchQuery
+    _single_flight_cls = AsyncSingleFlight
+
+    def __init__(self, client, index_cls=None, **kwargs):
+        super(AsyncCluster, self).__init__(
+            client, index_cls=index_cls or AsyncIndex, **kwargs
+        )
+
+    async def _request(self, event, params, send):
+        if event is None:
+            return await send()
+        self._before_request(event, params)
+        try:
+            raw_result = await send()
+        except Exception as e:
+            self._request_failed(event, e)
+            raise
+        event._sent(raw_result)
+        return raw_result
+
+    async def get(self, index, id, **kwargs):
+        event = self._start_request('get')
+        doc_cls, params = self._get_params(index, id, **kwargs)
+        raw_result = await self._request(event, params, lambda: self._client.get(**params))
+        return self._finish_request(
+            event, lambda: self._get_result(doc_cls, raw_result)
+        )
+
+    async def multi_get(self, docs, **kwargs):
+        event = self._start_request('multi_get')
+        doc_classes, params = self._multi_get_params(docs, **kwargs)
+        raw_result = await self._request(event, params, lambda: self._client.mget(**params))
+        return self._finish_request(
+            event, lambda: self._multi_get_result(doc_classes, raw_result)
+        )
+
+    mget = multi_get
+
+    async def search(self, q, **kwargs):
+        event = self._start_request('search')
+        params = self._search_params(q, **kwargs)
+        raw_result = await self._request(
+            event, params, lambda: self._fetch_search(q, params)
+        )
+        return self._finish_request(
+            event, lambda: self._search_result(q, raw_result)
+        )
+
+    async def _fetch_search(self, q, params):
+        cache_key = self._search_cache_key(q, params)
+        raw_result = self._get_cached_response(cache_key)
+        if raw_result is not None:
+            return raw_result
+        flight_key = self._search_flight_key(q, params, cache_key)
+        if flight_key is None:
+            return await self._send_search(q, params, cache_key)
+        return await self._single_flight.do(
+            flight_key, lambda: self._send_search(q, params, cache_key)
+        )
+
+    async def _send_search(self, q, params, cache_key):
+        raw_result = await self._client.search(**params)
+        self._cache_response(q, cache_key, raw_result)
+        return raw_result
+
+    async def count(self, q, **kwargs):
+        event = self._start_request('count')
+        params = self._count_params(q, **kwargs)
+        raw_result = await self._request(event, params, lambda: self._client.count(**params))
+        return self._finish_request(event, lambda: CountResult(raw_result))
+
+    async def exists(self, q, **kwargs):
+        event = self._start_request('exists')
+        params = self._exists_params(q, **kwargs)
+        raw_result = await self._request(
+            event, params, lambda: self._client.search_exists(**params)
+        )
+        return self._finish_request(event, lambda: ExistsResult(raw_result))
+
+    async def scroll(self, scroll_id, scroll, doc_cls=None, instance_mapper=None, **kwargs):
+        event = self._start_request('scroll')
+        params = self._scroll_params(scroll_id, scroll, **kwargs)
+        raw_result = await self._request(event, params, lambda: self._client.scroll(**params))
+        return self._finish_request(event, lambda: self._scroll_result(
+            raw_result, doc_cls=doc_cls, instance_mapper=instance_mapper,
+        ))
+
+    async def clear_scroll(self, scroll_id, **kwargs):
+        event = self._start_request('clear_scroll')
+        params = clean_params(kwargs, scroll_id=scroll_id)
+        raw_result = await self._request(
+            event, params, lambda: self._client.clear_scroll(**params)
+        )
+        return self._finish_request(event, lambda: ClearScrollResult(raw_result))
+
+    async def scan(self, q, scroll='1m', prefetch=True, **kwargs):
+        result = await self.search(q, scroll=scroll, **kwargs)
+        scroll_id = result.scroll_id
+        doc_cls = q._get_doc_cls()
+        next_page = None
+        try:
+            first_page = True
+            while result.hits or (first_page and result.total):
+                first_page = False
+                if prefetch:
+                    next_page = asyncio.ensure_future(self.scroll(
+                        scroll_id, scroll,
+                        doc_cls=doc_cls, instance_mapper=q._instance_mapper
+                    ))
+                for doc in result.hits:
+                    yield doc
+                if next_page is not None:
+                    result = await next_page
+                    next_page = None
+                else:
+                    result = await self.scroll(
+                        scroll_id, scroll,
+                        doc_cls=doc_cls, instance_mapper=q._instance_mapper
+                    )
+                scroll_id = result.scroll_id or scroll_id
+        finally:
+            if next_page is not None:
+                try:
+                    scroll_id = (await next_page).scroll_id or scroll_id
+                except Exception:
+                    pass
+            if scroll_id:
+                await self.clear_scroll(scroll_id)
+
+    def sliced_scan(self, q, slices, scroll='1m', callback=None,
+                    queue_size=1000, **kwargs):
+        """Returns asynchronous iterator over documents of all slices or
+        awaitable of results of ``callback`` coroutine called for every slice.
+        """
+        slice_queries = [q.slice(slice_id, slices) for slice_id in range(slices)]
+        if callback is None:
+            return self._iter_sliced_scan(slice_queries, scroll, queue_size, kwargs)
+        return asyncio.gather(*[
+            callback(sq, self.scan(sq, scroll=scroll, **kwargs))
+            for sq in slice_queries
+        ])
+
+    async def _iter_sliced_scan(self, slice_queries, scroll, queue_size, kwargs):
+        docs = asyncio.Queue(queue_size)
+
+        async def scan_slice(sq):
+            scan = self.scan(sq, scroll=scroll, **kwargs)
+            try:
+                async for doc in scan:
+                    await docs.put(doc)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await docs.put(_SliceDone(e))
+                return
+            finally:
+                await scan.aclose()
+            await docs.put(_SliceDone())
+
+        tasks = [asyncio.ensure_future(scan_slice(sq)) for sq in slice_queries]
+        try:
+            finished = 0
+            while finished < len(tasks):
+                doc = await docs.get()
+                if isinstance(doc, _SliceDone):
+                    if doc.error is not None:
+                        raise doc.error
+                    finished += 1
+                    continue
+                yield doc
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def multi_search(self, queries, raise_on_error=None, **kwargs):
+        event = self._start_request('multi_search')
+        params = self._multi_search_params(**kwargs)
+        cache_keys, responses = self._multi_search_cached(queries, params)
+        missed = [q for q, raw in zip(queries, responses) if raw is None]
+        body = self._multi_search_body(missed)
+
+        async def send():
+            if not missed:
+                return {'responses': []}
+            return await self._client.msearch(body=body, **params)
+
+        raw_results = await self._request(event, dict(params, body=body), send)
+        return self._finish_request(event, lambda: self._multi_search_result(
+            queries,
+            self._multi_search_merge(queries, cache_keys, responses, raw_results),
+            raise_on_error=raise_on_error,
+        ))
+
+    msearch = multi_search
+
+    async def put_mapping(self, doc_cls_or_mapping, index, **kwargs):
+        event = self._start_request('put_mapping')
+        params = self._put_mapping_params(doc_cls_or_mapping, index, **kwargs)
+        raw_result = await self._request(
+            event, params, lambda: self._client.indices.put_mapping(**params)
+        )
+        return self._finish_request(event, lambda: raw_result)
+
+    async def delete(self, doc_or_id, index, **kwargs):
+        event = self._start_request('delete')
+        params = self._delete_params(doc_or_id, index, **kwargs)
+        raw_result = await self._request(event, params, lambda: self._client.delete(**params))
+        return self._finish_request(event, lambda: DeleteResult(raw_result))
+
+    async def delete_by_query(self, q, **kwargs):
+        event = self._start_request('delete_by_query')
+        params = self._delete_by_query_params(q, **kwargs)
+        raw_result = await self._request(
+            event, params, lambda: self._client.delete_by_query(**params)
+        )
+        return self._finish_request(event, lambda: DeleteByQueryResult(raw_result))
+
+    async def bulk(self, actions, retry=None, **kwargs):
+        params = self._bulk_params(**kwargs)
+        if retry is not None:
+            serializer = self._get_bulk_serializer()
+            chunk = [
+                serializer.dumps_lines(self._bulk_action_lines(act))
+                for act in actions
+            ]
+            return await self._send_bulk_chunk(chunk, params, retry)
+        event = self._start_request('bulk')
+        return await self._bulk_request(event, self._bulk_body(actions), params)
+
+    async def streaming_bulk(
+            self, actions, chunk_size=BULK_CHUNK_SIZE,
+            max_chunk_bytes=BULK_MAX_CHUNK_BYTES, retry=None, **kwargs
+    ):
+        params = self._bulk_params(**kwargs)
+        for chunk in self._iter_bulk_chunks(actions, chunk_size, max_chunk_bytes):
+            yield await self._send_bulk_chunk(chunk, params, retry)
+
+    async def parallel_bulk(
+            self, actions, concurrency=4,
+            chunk_size=BULK_CHUNK_SIZE, max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+            retry=None, **kwargs
+    ):
+        params = self._bulk_params(**kwargs)
+        pending = collections.deque()
+        try:
+            for chunk in self._iter_bulk_chunks(actions, chunk_size, max_chunk_bytes):
+                if len(pending) >= concurrency:
+                    yield await pending.popleft()
+                pending.append(
+                    asyncio.ensure_future(self._send_bulk_chunk(chunk, params, retry))
+                )
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for fut in pending:
+                fut.cancel()
+
+    async def _bulk_request(self, event, body, params):
+        raw_result = await self._request(
+            event, dict(params, body=body),
+            lambda: self._client.bulk(body=body, **params)
+        )
+        return self._finish_request(event, lambda: BulkResult(raw_result))
+
+    async def _send_bulk_chunk(self, chunk, params, retry=None):
+        result = await self._bulk_request(
+            self._start_request('bulk'), ''.join(chunk), params
+        )
+        if retry is None or not result.errors:
+            return result
+        state = retry.start(chunk, result)
+        while state.has_failed():
+            await asyncio.sleep(state.get_backoff())
+            state.add_result(await self._bulk_request(
+                self._start_request('bulk'), state.get_body(), params
+            ))
+        return state.get_result()
+
+    async def refresh(self, index=None, **kwargs):
+        event = self._start_request('refresh')
+        params = clean_params({'index': index}, **kwargs)
+        raw_result = await self._request(
+            event, params, lambda: self._client.indices.refresh(**params)
+        )
+        return self._finish_request(event, lambda: RefreshResult(raw_result))
+
+    async def flush(self, index=None, **kwargs):
+        event = self._start_request('flush')
+        params = clean_params({'index': index}, **kwargs)
+        raw_result = await self._request(
+            event, params, lambda: self._client.indices.flush(**params)
+        )
+        return self._finish_request(event, lambda: FlushResult(raw_result))
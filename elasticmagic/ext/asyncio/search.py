@@ -0,0 +1,40 @@
+import asyncio
+
+from ...search import SearchQuery
+from ...util import cached_property
+
+
+class AsyncSearchQuery(SearchQuery):
+    """Search query for :class:`AsyncCluster`. Result must be fetched with
+    ``await sq.get_result()``, after that the query can be iterated as usual.
+    """
+
+    @cached_property
+    def result(self):
+        # fetched result is stored in the instance dict
+        raise ValueError('Result is not fetched, await get_result() first')
+
+    async def get_result(self):
+        if 'result' not in self.__dict__:
+            self.__dict__['result'] = await self._search()
+        return self.__dict__['result']
+
+    async def prefetch_instances(self, executor=None):
+        """Fetches result and runs its instance mappers concurrently in the
+        ``executor`` of the event loop, see
+        :meth:`SearchResult.prefetch_instances
+        <elasticmagic.result.SearchResult.prefetch_instances>`.
+        """
+        result = await self.get_result()
+        loop = asyncio.get_event_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, populate)
+            for populate in result._iter_instance_populators()
+        ))
+        return result
+
+    async def count(self):
+        return (await self._count()).count
+
+    async def exists(self, refresh=None):
+        return (await self._exists(refresh=refresh)).exists
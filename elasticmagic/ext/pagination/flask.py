@@ -85,3 +85,40 @@ class Pagination(object):
                     yield None
                 yield num
                 last = num
+
+
+class SearchAfterPagination(object):
+    """Forward-only paginator that uses ``search_after`` instead of offsets,
+    so deep pages are not limited by ``index.max_result_window``.
+    Pass :attr:`next_cursor` back to get the next page.
+    """
+    def __init__(self, query, cursor=None, per_page=20, tiebreaker='_uid'):
+        self.original_query = query
+        self.cursor = cursor
+        self.per_page = per_page
+        self.tiebreaker = tiebreaker
+
+        self.query = query.seek(cursor, tiebreaker=tiebreaker).limit(per_page)
+        self.items = list(self.query)
+        self.total = self.query.result.total
+
+    @property
+    def pages(self):
+        return int(ceil(self.total / float(self.per_page)))
+
+    @property
+    def has_prev(self):
+        return self.cursor is not None
+
+    @property
+    def has_next(self):
+        return len(self.items) >= self.per_page and self.next_cursor is not None
+
+    @property
+    def next_cursor(self):
+        return self.query.result.cursor
+
+    def next(self):
+        return type(self)(
+            self.original_query, cursor=self.next_cursor,
+            per_page=self.per_page, tiebreaker=self.tiebreaker)
@@ -2,7 +2,6 @@ from __future__ import absolute_import
 from collections import defaultdict
 
 from .util import to_camel_case
-from .search import SearchQuery
 from .result import Result
 from .document import DynamicDocument
 from .expression import Params
@@ -36,7 +35,7 @@ class Index(object):
     def search_query(self, *args, **kwargs):
         kwargs['index'] = self
         kwargs.setdefault('_compiler', self._cluster._compiler.get_query_compiler())
-        return SearchQuery(*args, **kwargs)
+        return self._cluster._search_query_cls(*args, **kwargs)
 
     query = search_query
 
@@ -102,6 +101,21 @@ class Index(object):
             **kwargs
         )
 
+    def clear_scroll(self, scroll_id, **kwargs):
+        return self._cluster.clear_scroll(scroll_id, **kwargs)
+
+    def scan(self, q, doc_type=None, scroll='1m', prefetch=True, **kwargs):
+        return self._cluster.scan(
+            q, index=self._name, doc_type=doc_type, scroll=scroll,
+            prefetch=prefetch, **kwargs
+        )
+
+    def sliced_scan(self, q, slices, doc_type=None, scroll='1m', callback=None, **kwargs):
+        return self._cluster.sliced_scan(
+            q, slices, index=self._name, doc_type=doc_type, scroll=scroll,
+            callback=callback, **kwargs
+        )
+
     def put_mapping(self, doc_cls_or_mapping, doc_type=None, allow_no_indices=None,
                     expand_wildcards=None, ignore_conflicts=None, ignore_unavailable=None,
                     master_timeout=None, timeout=None, **kwargs):
@@ -114,13 +128,9 @@ class Index(object):
         )
 
     def add(self, docs, doc_type=None, timeout=None, consistency=None, replication=None, **kwargs):
-        from . import actions
-
-        acts = []
-        for doc in docs:
-            acts.append(actions.Index(doc))
+        # documents are turned into index actions by the cluster
         return self._cluster.bulk(
-            acts, index=self._name, doc_type=doc_type,
+            docs, index=self._name, doc_type=doc_type,
             timeout=timeout, consistency=consistency, replication=replication
         )
 
@@ -152,6 +162,16 @@ class Index(object):
         return self._cluster.bulk(
             actions, index=self._name, doc_type=doc_type, refresh=refresh, **kwargs
         )
+
+    def streaming_bulk(self, actions, doc_type=None, refresh=None, **kwargs):
+        return self._cluster.streaming_bulk(
+            actions, index=self._name, doc_type=doc_type, refresh=refresh, **kwargs
+        )
+
+    def parallel_bulk(self, actions, doc_type=None, refresh=None, **kwargs):
+        return self._cluster.parallel_bulk(
+            actions, index=self._name, doc_type=doc_type, refresh=refresh, **kwargs
+        )
         
     def refresh(self, **kwargs):
         return self._cluster.refresh(index=self._name, **kwargs)
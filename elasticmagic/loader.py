@@ -0,0 +1,98 @@
+from .compat import text_type
+
+
+def _get_key_prefix(load):
+    name = getattr(load, '__qualname__', None) or getattr(load, '__name__', None)
+    if not name or '<' in name:
+        # lambdas and nested functions can share the same name
+        raise ValueError(
+            'Cannot make cache key prefix for {!r}, pass key_prefix'.format(load)
+        )
+    return u'{}.{}:'.format(load.__module__, name)
+
+
+class InstanceLoader(object):
+    """Instance mapper that loads instances in batches and remembers them.
+
+    ``load`` takes list of ids and returns dict of id to instance, like any
+    other instance mapper. Loaded instances are kept in the identity map of
+    the loader, so create a loader per request. Pass ``cache`` shared between
+    requests to load only ids missing in it, any backend from
+    :mod:`elasticmagic.cache` can be used. Not found ids are not cached.
+    Cache keys are prefixed with ``key_prefix``, by default it is made of
+    the module and the name of ``load`` function, lambdas and other callables
+    without unique name require explicit prefix.
+
+    .. code-block:: python
+
+        product_cache = MemoryResultCache(maxsize=10000, ttl=60)
+
+        sq = (
+            index.search_query()
+            .with_instance_mapper(
+                InstanceLoader(load_products, cache=product_cache, batch_size=500)
+            )
+        )
+    """
+
+    def __init__(self, load, cache=None, ttl=None, batch_size=None, key_prefix=None):
+        self.load = load
+        self.cache = cache
+        self.ttl = ttl
+        self.batch_size = batch_size
+        if key_prefix is None and cache is not None:
+            key_prefix = _get_key_prefix(load)
+        self.key_prefix = key_prefix
+        self._identity_map = {}
+
+    def __call__(self, ids):
+        instances = {}
+        missing_ids = []
+        seen_ids = set()
+        for id in ids:
+            if id in seen_ids:
+                continue
+            seen_ids.add(id)
+            if id in self._identity_map:
+                instances[id] = self._identity_map[id]
+            else:
+                missing_ids.append(id)
+
+        if missing_ids and self.cache is not None:
+            ids_to_load = []
+            for id in missing_ids:
+                instance = self.cache.get(self._cache_key(id))
+                if instance is None:
+                    ids_to_load.append(id)
+                else:
+                    instances[id] = self._identity_map[id] = instance
+            missing_ids = ids_to_load
+
+        for batch_ids in self._iter_batches(missing_ids):
+            loaded = self.load(batch_ids)
+            for id in batch_ids:
+                instance = loaded.get(id)
+                if instance is None:
+                    continue
+                instances[id] = self._identity_map[id] = instance
+                if self.cache is not None:
+                    self.cache.set(self._cache_key(id), instance, ttl=self.ttl)
+        return instances
+
+    def _iter_batches(self, ids):
+        if not ids:
+            return
+        batch_size = self.batch_size or len(ids)
+        for start in range(0, len(ids), batch_size):
+            yield ids[start:start + batch_size]
+
+    def _cache_key(self, id):
+        return u'{}{}'.format(self.key_prefix, text_type(id))
+
+    def get(self, id):
+        """Returns already loaded instance."""
+        return self._identity_map.get(id)
+
+    def clear(self):
+        """Clears the identity map, shared cache is not affected."""
+        self._identity_map.clear()
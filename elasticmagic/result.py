@@ -1,16 +1,107 @@
 import collections
+from functools import partial
+from multiprocessing.pool import ThreadPool
 
 from elasticsearch import ElasticsearchException
 
 from .agg import BucketAgg
-from .compat import string_types
-from .document import DynamicDocument
+from .attribute import AttributedField
+from .columns import FLOAT_TYPECODE, get_typecode, make_column
+from .compat import Sequence, string_types
+from .document import DynamicDocument, META_FIELD_NAMES
+from .util import encode_cursor
 
 
 class DelayedElasticsearchException(ElasticsearchException):
     pass
 
 
+HIT_META_FIELD_NAMES = META_FIELD_NAMES | {'_score'}
+
+
+def _call(fn):
+    return fn()
+
+
+def _get_source_value(source, field_path):
+    value = source
+    for fname in field_path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(fname)
+    return value
+
+
+def _get_field_type(doc_cls, field_path):
+    field_type = None
+    for fname in field_path:
+        if doc_cls is None:
+            return None
+        attr_field = doc_cls._field_name_map.get(fname)
+        if not attr_field:
+            return None
+        field_type = attr_field.get_type()
+        doc_cls = field_type.doc_cls
+    return field_type
+
+
+class LazyHits(Sequence):
+    """Sequence of search hits that builds documents on first access.
+    Compares equal to lists and tuples of the same documents.
+    """
+    def __init__(self, raw_hits, doc_cls_map, result=None):
+        self._raw_hits = raw_hits
+        self._doc_cls_map = doc_cls_map
+        self._result = result
+        self._docs = [None] * len(raw_hits)
+
+    def _get_doc(self, ix):
+        doc = self._docs[ix]
+        if doc is None:
+            hit = self._raw_hits[ix]
+            doc_cls = self._doc_cls_map.get(hit['_type'], DynamicDocument)
+            doc = self._docs[ix] = doc_cls(_hit=hit, _result=self._result)
+        return doc
+
+    def __len__(self):
+        return len(self._raw_hits)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self._get_doc(ix) for ix in range(*k.indices(len(self)))]
+        if k < 0:
+            k += len(self)
+        if k < 0 or k >= len(self):
+            raise IndexError('hit index out of range')
+        return self._get_doc(k)
+
+    def __iter__(self):
+        for ix in range(len(self)):
+            yield self._get_doc(ix)
+
+    def __eq__(self, other):
+        if isinstance(other, (LazyHits, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        if eq is NotImplemented:
+            return eq
+        return not eq
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return '<LazyHits {!r}>'.format(list(self))
+
+
 class Result(object):
     def __init__(self, raw_result):
         self.raw = raw_result
@@ -48,10 +139,9 @@ class SearchResult(Result):
         if not self.error or 'hits' in raw_result:
             self.total = raw_result['hits']['total']
             self.max_score = raw_result['hits']['max_score']
-            self.hits = []
-            for hit in raw_result['hits']['hits']:
-                doc_cls = self._doc_cls_map.get(hit['_type'], DynamicDocument)
-                self.hits.append(doc_cls(_hit=hit, _result=self))
+            self.hits = LazyHits(
+                raw_result['hits']['hits'], self._doc_cls_map, result=self
+            )
 
         if not self.error or 'aggregations' in raw_result:
             self.aggregations = {}
@@ -74,6 +164,115 @@ class SearchResult(Result):
     def get_aggregation(self, name):
         return self.aggregations.get(name)
 
+    @property
+    def cursor(self):
+        """Opaque cursor pointing after the last hit, pass it to
+        :meth:`SearchQuery.seek <elasticmagic.search.SearchQuery.seek>`
+        to fetch the next page. ``None`` when there are no sorted hits.
+        """
+        if self.error and 'hits' not in self.raw:
+            raise DelayedElasticsearchException(self.error)
+        raw_hits = self.raw['hits']['hits']
+        if not raw_hits or 'sort' not in raw_hits[-1]:
+            return None
+        return encode_cursor(raw_hits[-1]['sort'])
+
+    def to_columns(self, fields, use_numpy=None):
+        """Returns dict of columns with values of ``fields`` taken from raw
+        hits without creating documents.
+
+        ``fields`` are document attributes or field names, including meta
+        fields like ``_id`` and ``_score``. Values are converted by the field
+        type, missing float values are ``nan``. Columns are built by
+        :func:`elasticmagic.columns.make_column`.
+        """
+        if self.error and 'hits' not in self.raw:
+            raise DelayedElasticsearchException(self.error)
+        raw_hits = self.raw['hits']['hits']
+
+        columns = {}
+        for field in fields:
+            if isinstance(field, AttributedField):
+                field_name = field.get_field_name()
+                field_types = {None: field.get_type()}
+            else:
+                field_name = field
+                field_types = None
+
+            if field_name in HIT_META_FIELD_NAMES:
+                values = [hit.get(field_name) for hit in raw_hits]
+                typecode = FLOAT_TYPECODE if field_name == '_score' else None
+            else:
+                values, typecode = self._get_field_values(
+                    raw_hits, field_name.split('.'), field_types
+                )
+
+            if typecode == FLOAT_TYPECODE:
+                nan = float('nan')
+                values = [nan if v is None else v for v in values]
+            columns[field_name] = make_column(
+                values, typecode, use_numpy=use_numpy
+            )
+        return columns
+
+    def _get_field_values(self, raw_hits, field_path, field_types=None):
+        resolve_types = field_types is None
+        if resolve_types:
+            field_types = {}
+        values = []
+        for hit in raw_hits:
+            if resolve_types:
+                doc_type = hit.get('_type')
+                if doc_type not in field_types:
+                    field_types[doc_type] = _get_field_type(
+                        self._doc_cls_map.get(doc_type), field_path
+                    )
+                field_type = field_types[doc_type]
+            else:
+                field_type = field_types[None]
+
+            value = _get_source_value(hit.get('_source'), field_path)
+            if field_type is not None:
+                value = field_type.to_python(value)
+            values.append(value)
+
+        typecodes = set(map(get_typecode, field_types.values()))
+        typecode = typecodes.pop() if len(typecodes) == 1 else None
+        return values, typecode
+
+    def prefetch_instances(self, max_workers=None):
+        """Populates instances of hits and aggregation results calling
+        every instance mapper once, mappers run concurrently in a thread pool
+        so they must be thread safe. By default every mapper gets its own
+        thread.
+        """
+        populators = list(self._iter_instance_populators())
+        if len(populators) <= 1 or max_workers == 1:
+            for populate in populators:
+                populate()
+            return
+
+        pool = ThreadPool(max_workers or len(populators))
+        try:
+            pool.map(_call, populators)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _iter_instance_populators(self):
+        for doc_cls, instance_mapper in self._instance_mappers.items():
+            if not instance_mapper:
+                continue
+            is_pending = any(
+                isinstance(doc, doc_cls) and 'instance' not in doc.__dict__
+                for doc in self.hits
+            )
+            if is_pending:
+                yield partial(self._populate_instances, doc_cls)
+        for instance_mapper, agg_results in self._mapper_registry.items():
+            for populate in agg_results[0]._iter_instance_populators(instance_mapper):
+                yield populate
+
     def _populate_instances(self, doc_cls):
         docs = [doc for doc in self.hits if isinstance(doc, doc_cls)]
         instances = self._instance_mappers.get(doc_cls)([doc._id for doc in docs])
@@ -126,6 +325,8 @@ class BulkResult(Result):
         self.took = raw_result['took']
         self.errors = raw_result['errors']
         self.items = list(map(ActionResult, raw_result['items']))
+        # results of every request when failed actions were resent
+        self.attempts = None
 
     def __iter__(self):
         return iter(self.items)
@@ -149,5 +350,9 @@ class RefreshResult(Result):
     pass
 
 
+class ClearScrollResult(Result):
+    pass
+
+
 class FlushResult(Result):
     pass
@@ -1,11 +1,18 @@
+import copy
 import warnings
 import collections
 
-from .compat import zip
-from .util import _with_clone, cached_property, clean_params, merge_params, collect_doc_classes
+from .compat import zip, string_types
+from .util import (
+    _with_clone, cached_property, clean_params, merge_params,
+    collect_doc_classes, make_key, decode_cursor, fingerprint,
+    _normalize_search_body,
+)
 from .result import Result
-from .compiler import DefaultCompiler
-from .expression import Expression, ParamsExpression, Params, Filtered, And, Bool, FunctionScore
+from .compiler import DefaultCompiler, Template
+from .expression import (
+    Expression, ParamsExpression, Params, Filtered, And, Bool, FunctionScore, Sort,
+)
 
 
 __all__ = ['SearchQuery']
@@ -64,6 +71,18 @@ class Highlight(Expression):
         )
 
 
+def _get_sort_field_name(expr):
+    if isinstance(expr, Sort):
+        expr = expr.expr
+    if isinstance(expr, string_types):
+        return expr
+    if hasattr(expr, 'get_field_name'):
+        return expr.get_field_name()
+    if hasattr(expr, 'get_name'):
+        return expr.get_name()
+    return None
+
+
 class SearchQuery(object):
     __visit_name__ = 'search_query'
 
@@ -85,6 +104,8 @@ class SearchQuery(object):
     _rescores = ()
     _suggest = Params()
     _highlight = Params()
+    _slice = None
+    _search_after = None
 
     _cluster = None
     _index = None
@@ -96,6 +117,18 @@ class SearchQuery(object):
     _instance_mapper = None
     _iter_instances = False
 
+    _result_cache = True
+    _result_cache_ttl = None
+
+    # process-wide cache of compiled bodies, for example LRUCache instance
+    compiled_cache = None
+
+    _NON_BODY_ATTRS = {
+        '_cluster', '_index', '_doc_type', '_search_params',
+        '_instance_mapper', '_iter_instances', '_compiler',
+        '_result_cache', '_result_cache_ttl',
+    }
+
     def __init__(
             self, q=None,
             cluster=None, index=None, doc_cls=None, doc_type=None,
@@ -137,7 +170,71 @@ class SearchQuery(object):
         return q
 
     def to_dict(self):
-        return self._compiler(self).params
+        """Returns compiled search query body. The body is compiled once per
+        query, nested values of the returned dict are shared with it
+        and must not be modified.
+        """
+        params, is_shared = self._compiled
+        if is_shared:
+            # body from compiled_cache is shared with equal queries
+            return copy.deepcopy(params)
+        return copy.copy(params)
+
+    def to_template(self):
+        """Compiles search query with :class:`Param` placeholders once,
+        request bodies are produced by ``bind``::
+
+            template = sq.filter(PostDocument.user_id == Param('user_id')).to_template()
+            body = template.bind(user_id=123)
+        """
+        return Template(self._compiled_params)
+
+    @property
+    def _compiled_params(self):
+        return self._compiled[0]
+
+    @cached_property
+    def _compiled(self):
+        # search query is immutable so compiled body is stored per instance,
+        # clones do not inherit it; returns body and whether it is shared
+        cache = self.compiled_cache
+        if cache is None:
+            return self._compiler(self).params, False
+
+        try:
+            key = (self._compiler, self._get_cache_key())
+            params = cache.get(key)
+        except TypeError:
+            # expression tree contains unhashable values
+            return self._compiler(self).params, False
+        if params is None:
+            params = self._compiler(self).params
+            cache.set(key, params)
+        return params, True
+
+    def fingerprint(self, normalize=False):
+        """Canonical hash of the search query body. With ``normalize``
+        queries that differ only in literal values have the same fingerprint.
+        """
+        if normalize:
+            return self._normalized_fingerprint
+        return self._fingerprint
+
+    @cached_property
+    def _fingerprint(self):
+        return fingerprint(self._compiled_params)
+
+    @cached_property
+    def _normalized_fingerprint(self):
+        return fingerprint(_normalize_search_body(self._compiled_params))
+
+    def _get_cache_key(self):
+        cls = self.__class__
+        return make_key({
+            k: v for k, v in self.__dict__.items()
+            if k not in self._NON_BODY_ATTRS and
+            not isinstance(getattr(cls, k, None), cached_property)
+        })
 
     @_with_clone
     def source(self, *args, **kwargs):
@@ -246,6 +343,37 @@ class SearchQuery(object):
         else:
             self._suggest = merge_params(self._suggest, args, kwargs)
 
+    @_with_clone
+    def slice(self, id, max, field=None):
+        if id is None:
+            self._slice = None
+        else:
+            self._slice = Params(id=id, max=max, field=field)
+
+    @_with_clone
+    def search_after(self, *values):
+        if values == (None,) or not values:
+            self._search_after = None
+        else:
+            self._search_after = values
+
+    def seek(self, cursor=None, tiebreaker='_uid'):
+        """Keyset pagination: adds ``tiebreaker`` to the sort order and
+        continues after the hit the ``cursor`` was taken from.
+        See :attr:`SearchResult.cursor <elasticmagic.result.SearchResult.cursor>`.
+        """
+        q = self
+        if tiebreaker is not None:
+            tiebreaker_name = _get_sort_field_name(tiebreaker)
+            if not any(
+                    _get_sort_field_name(o) == tiebreaker_name
+                    for o in self._order_by
+            ):
+                q = q.order_by(tiebreaker)
+        if cursor is None:
+            return q.search_after(None)
+        return q.search_after(*decode_cursor(cursor))
+
     @_with_clone
     def highlight(
             self, fields=None, type=None, pre_tags=None, post_tags=None,
@@ -288,6 +416,14 @@ class SearchQuery(object):
     def with_instance_mapper(self, instance_mapper):
         self._instance_mapper = instance_mapper
 
+    @_with_clone
+    def with_result_cache(self, enabled=True, ttl=None):
+        """Controls caching of the search response when cluster has
+        a result cache. ``ttl`` overrides default expiration of the cache.
+        """
+        self._result_cache = enabled
+        self._result_cache_ttl = ttl
+
     def with_routing(self, routing):
         return self.with_search_params(routing=routing)
 
@@ -361,10 +497,15 @@ class SearchQuery(object):
             return doc_cls.__doc_type__
 
     def get_context(self, compiler=None):
-        return SearchQueryContext(self, compiler or self._compiler)
+        if compiler is None or compiler is self._compiler:
+            return self._context
+        return SearchQueryContext(self, compiler)
 
     @cached_property
-    def result(self):
+    def _context(self):
+        return SearchQueryContext(self, self._compiler)
+
+    def _search(self):
         doc_cls = self._get_doc_cls()
         doc_type = self._get_doc_type(doc_cls)
         return (self._index or self._cluster).search(
@@ -373,26 +514,67 @@ class SearchQuery(object):
             **(self._search_params or {})
         )
 
+    @cached_property
+    def result(self):
+        cluster = self._cluster or (self._index and self._index.get_cluster())
+        batch = cluster._find_batch(self) if cluster else None
+        if batch is not None:
+            # multi search stores results of all batched queries
+            batch.flush()
+            return self.__dict__['result']
+        return self._search()
+
+    def scan(self, scroll='1m', prefetch=True):
+        """Iterates over all matched documents page by page,
+        see :meth:`Cluster.scan`.
+        """
+        search_params = dict(self._search_params or {})
+        return (self._index or self._cluster).scan(
+            self,
+            doc_type=self._get_doc_type(),
+            scroll=search_params.pop('scroll', scroll),
+            prefetch=prefetch,
+            **search_params
+        )
+
+    def sliced_scan(self, slices, scroll='1m', callback=None, **kwargs):
+        """Scans ``slices`` slices of the search query concurrently,
+        see :meth:`Cluster.sliced_scan`.
+        """
+        search_params = dict(self._search_params or {})
+        search_params.update(kwargs)
+        return (self._index or self._cluster).sliced_scan(
+            self, slices,
+            doc_type=self._get_doc_type(),
+            scroll=search_params.pop('scroll', scroll),
+            callback=callback,
+            **search_params
+        )
+
     @property
     def results(self):
         return self.result
 
-    def count(self):
-        res = self._index.count(
+    def _count(self):
+        return self._index.count(
             self.get_context().get_filtered_query(wrap_function_score=False),
             doc_type=self._get_doc_type(),
             routing=self._search_params.get('routing'),
         )
-        return res.count
 
-    def exists(self, refresh=None):
-        res = self._index.exists(
+    def count(self):
+        return self._count().count
+
+    def _exists(self, refresh=None):
+        return self._index.exists(
             self.get_context().get_filtered_query(wrap_function_score=False),
             self._get_doc_type(),
             refresh=refresh,
             routing=self._search_params.get('routing'),
         )
-        return res.exists
+
+    def exists(self, refresh=None):
+        return self._exists(refresh=refresh).exists
 
     def delete(self, timeout=None, consistency=None, replication=None):
         return self._index.delete_by_query(
@@ -455,6 +637,8 @@ class SearchQueryContext(object):
         self.rescores = search_query._rescores
         self.suggest = search_query._suggest
         self.highlight = search_query._highlight
+        self.slice = search_query._slice
+        self.search_after = search_query._search_after
 
         self.cluster = search_query._cluster
         self.index = search_query._index
@@ -0,0 +1,50 @@
+import json
+
+from elasticsearch.exceptions import SerializationError
+from elasticsearch.serializer import JSONSerializer as _JSONSerializer
+
+from .compat import string_types
+
+try:
+    import orjson
+    ORJSON_IMPORTED = True
+except ImportError:
+    ORJSON_IMPORTED = False
+
+
+class JSONSerializer(_JSONSerializer):
+    """Serializes request bodies before they are passed to the client,
+    transport sends strings as is.
+    """
+
+    def _dumps(self, data):
+        return json.dumps(data, default=self.default, separators=(',', ':'))
+
+    def dumps(self, data):
+        if isinstance(data, string_types):
+            return data
+        try:
+            return self._dumps(data)
+        except (ValueError, TypeError) as e:
+            raise SerializationError(data, e)
+
+    def dumps_lines(self, lines):
+        """Serializes body of bulk and multi search requests."""
+        return ''.join([self.dumps(line) + '\n' for line in lines])
+
+
+class OrjsonSerializer(JSONSerializer):
+    def __init__(self):
+        if not ORJSON_IMPORTED:
+            raise ImportError('orjson is required for OrjsonSerializer')
+
+    def _dumps(self, data):
+        return orjson.dumps(
+            data, default=self.default, option=orjson.OPT_NON_STR_KEYS
+        ).decode('utf-8')
+
+
+def get_default_serializer():
+    if ORJSON_IMPORTED:
+        return OrjsonSerializer()
+    return JSONSerializer()
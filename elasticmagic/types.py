@@ -5,6 +5,7 @@ import re
 import copy
 
 import dateutil.parser
+import dateutil.tz
 
 try:
     import geohash
@@ -12,7 +13,7 @@ try:
 except ImportError:
     GEOHASH_IMPORTED = False
 
-from .compat import text_type, string_types
+from .compat import text_type, string_types, int_types
 
 
 def instantiate(typeobj, *args, **kwargs):
@@ -133,14 +134,67 @@ class Double(_Float):
 class Date(Type):
     __visit_name__ = 'date'
 
+    # strict_date_optional_time
+    ISO_DATETIME_REGEXP = re.compile(
+        r'^(\d{4})-(\d{2})-(\d{2})'
+        r'(?:T(\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d+))?)?'
+        r'(Z|[+-]\d{2}(?::?\d{2})?)?)?\Z'
+    )
+
+    EPOCH = datetime.datetime(1970, 1, 1, tzinfo=dateutil.tz.tzutc())
+
+    _tz_cache = {'Z': dateutil.tz.tzutc()}
+
     # def __init__(self, format=None):
     #     self.format = format
 
     def to_python(self, value):
+        """Parses date string or epoch milliseconds. Epoch milliseconds
+        give timezone aware datetime in UTC while strings without offset
+        give naive datetime.
+        """
         if value is None:
             return None
+        if isinstance(value, string_types):
+            dt = self._parse_iso_datetime(value)
+            if dt is not None:
+                return dt
+        elif (
+                isinstance(value, int_types + (float,)) and
+                not isinstance(value, bool)
+        ):
+            # epoch_millis
+            return self.EPOCH + datetime.timedelta(milliseconds=value)
         return dateutil.parser.parse(value)
 
+    def _parse_iso_datetime(self, value):
+        m = self.ISO_DATETIME_REGEXP.match(value)
+        if not m:
+            return None
+        year, month, day, hour, minute, second, fraction, tz = m.groups()
+        if fraction:
+            microsecond = int(fraction[:6].ljust(6, '0'))
+        else:
+            microsecond = 0
+        tzinfo = self._get_tz(tz) if tz else None
+        try:
+            return datetime.datetime(
+                int(year), int(month), int(day),
+                int(hour or 0), int(minute or 0), int(second or 0),
+                microsecond, tzinfo
+            )
+        except ValueError:
+            return None
+
+    def _get_tz(self, tz):
+        tzinfo = self._tz_cache.get(tz)
+        if tzinfo is None:
+            sign = -1 if tz[0] == '-' else 1
+            offset = tz[1:].replace(':', '')
+            seconds = int(offset[:2]) * 3600 + int(offset[2:] or 0) * 60
+            tzinfo = self._tz_cache[tz] = dateutil.tz.tzoffset(None, sign * seconds)
+        return tzinfo
+
     def from_python(self, value, validate=True):
         if validate:
             if not isinstance(value, datetime.datetime):
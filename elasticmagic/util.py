@@ -1,7 +1,12 @@
+import json
+import base64
+import hashlib
 import collections
 from functools import wraps
 from itertools import chain
 
+from .compat import int_types, string_types, force_unicode
+
 
 def _with_clone(fn):
     @wraps(fn)
@@ -26,6 +31,83 @@ class cached_property(object):
         return res
 
 
+def encode_cursor(values):
+    data = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor):
+    if not isinstance(cursor, bytes):
+        cursor = cursor.encode('ascii')
+    cursor += b'=' * (-len(cursor) % 4)
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor).decode('utf-8'))
+    except (TypeError, ValueError):
+        raise ValueError('Invalid cursor: {!r}'.format(cursor))
+
+
+LITERAL_PLACEHOLDER = '?'
+
+# values of these keys are field names or options, not literals
+_STRUCTURAL_KEYS = frozenset([
+    'field', 'fields', 'path', 'type', 'default_field',
+    'operator', 'score_mode', 'boost_mode',
+])
+_QUERY_KEYS = frozenset(['query', 'filter', 'filters', 'post_filter', 'rescore_query'])
+_PAGINATION_KEYS = frozenset(['from', 'size', 'search_after'])
+
+
+def _normalize_literals(data):
+    # data is a query clause
+    if isinstance(data, dict):
+        return {
+            k: v if k in _STRUCTURAL_KEYS else _normalize_literals(v)
+            for k, v in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        if all(not isinstance(v, (dict, list, tuple)) for v in data):
+            # lists of values of any length have the same shape
+            return [LITERAL_PLACEHOLDER]
+        return [_normalize_literals(v) for v in data]
+    return LITERAL_PLACEHOLDER
+
+
+def _normalize_query_clauses(data):
+    if isinstance(data, dict):
+        return {
+            k: _normalize_literals(v) if k in _QUERY_KEYS else _normalize_query_clauses(v)
+            for k, v in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        return [_normalize_query_clauses(v) for v in data]
+    return data
+
+
+def _normalize_search_body(body):
+    """Replaces literals in query clauses and pagination values, sorting,
+    aggregations and other parts of the body are kept.
+    """
+    normalized = _normalize_query_clauses(body)
+    for key in _PAGINATION_KEYS:
+        if key in normalized:
+            normalized[key] = LITERAL_PLACEHOLDER
+    return normalized
+
+
+def fingerprint(data, normalize=False):
+    """Hex digest of compiled expression that does not depend on
+    dict ordering. With ``normalize`` literal values of the query clause
+    are replaced with placeholders, field names are kept, so queries of the
+    same shape have the same fingerprint.
+    """
+    if normalize:
+        data = _normalize_literals(data)
+    data = json.dumps(
+        data, sort_keys=True, separators=(',', ':'), default=force_unicode
+    )
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
 def to_camel_case(s):
     return u''.join(map(lambda w: w.capitalize(), s.split('_')))
 
@@ -53,6 +135,38 @@ def collect_doc_classes(expr):
     return set()
 
 
+_KEY_SCALAR_TYPES = frozenset(
+    string_types + int_types + (float, bool, type(None))
+)
+
+
+def make_key(expr):
+    """Builds hashable key that is equal for structurally equal expressions.
+    Raises :exc:`TypeError` when the expression contains unhashable values.
+    """
+    cls = expr.__class__
+    if cls in _KEY_SCALAR_TYPES:
+        # values of different types can be equal: 1 == 1.0 == True
+        return (cls, expr)
+
+    if isinstance(expr, type):
+        return expr
+
+    if hasattr(expr, '_get_cache_key'):
+        return expr._get_cache_key()
+
+    if isinstance(expr, (list, tuple)):
+        return (list,) + tuple([make_key(e) for e in expr])
+
+    if isinstance(expr, dict):
+        return (dict, frozenset([(make_key(k), make_key(v)) for k, v in expr.items()]))
+
+    if callable(expr) or not hasattr(expr, '__dict__'):
+        return (cls, expr)
+
+    return (cls, make_key(expr.__dict__))
+
+
 def maybe_float(value):
     if value is None:
         return None
@@ -24,6 +24,8 @@ setup(
     tests_require=parse_requirements("requirements_test.txt"),
     extras_require={
         "geo": parse_requirements("requirements_geo.txt"),
+        "json": parse_requirements("requirements_json.txt"),
+        "numpy": parse_requirements("requirements_numpy.txt"),
     },
     classifiers=[
         "Development Status :: 3 - Alpha",
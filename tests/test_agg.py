@@ -1,7 +1,10 @@
 import math
+import unittest
+from array import array
 from mock import Mock, patch
 
 from elasticmagic import agg, Params, Term, Document, DynamicDocument
+from elasticmagic.columns import NUMPY_IMPORTED
 from elasticmagic.types import Integer, Boolean, List
 from elasticmagic.expression import Field
 
@@ -870,6 +873,140 @@ class AggregationTest(BaseTestCase):
         self.assertEqual(question_mapper.call_count, 1)
         self.assertEqual(paper_mapper.call_count, 1)
 
+    def test_lazy_buckets(self):
+        f = DynamicDocument.fields
+
+        a = agg.Terms(
+            f.status, type=Integer,
+            aggs={'min_price': agg.Min(f.price), 'tags': agg.Terms(f.tags)}
+        )
+        raw_buckets = [
+            {
+                'key': i, 'doc_count': 100 - i,
+                'min_price': {'value': i * 10.0},
+                'tags': {'buckets': [{'key': 'tag{}'.format(i), 'doc_count': 1}]},
+            }
+            for i in range(100)
+        ]
+        a = a.build_agg_result({'buckets': raw_buckets})
+        self.assertEqual(a._buckets.count(None), 100)
+
+        bucket = a.get_bucket(42)
+        self.assertEqual(bucket.key, 42)
+        self.assertEqual(bucket.doc_count, 58)
+        self.assertEqual(a._buckets.count(None), 99)
+        self.assertIsNone(a.get_bucket(100))
+        self.assertEqual(bucket._aggregations, {})
+        self.assertEqual(bucket.get_aggregation('min_price').value, 420.0)
+        self.assertEqual(list(bucket._aggregations), ['min_price'])
+        self.assertIsNone(bucket.get_aggregation('unknown'))
+        self.assertEqual(
+            sorted(bucket.aggregations), ['min_price', 'tags']
+        )
+        self.assertIs(bucket.aggregations['min_price'], bucket.get_aggregation('min_price'))
+        self.assertEqual(bucket.get_aggregation('tags').get_bucket('tag42').doc_count, 1)
+
+        for _, b in zip(range(10), a):
+            pass
+        self.assertEqual(a._buckets.count(None), 89)
+        self.assertIs(a.buckets[42], bucket)
+        self.assertEqual(a._buckets.count(None), 0)
+
+        # keyed buckets are sorted by key and raw data is not modified
+        a = agg.Filters(
+            Params(b=f.status == 1, a=f.status == 0),
+            aggs={'min_price': agg.Min(f.price)}
+        )
+        raw_buckets = {
+            'b': {'doc_count': 2, 'min_price': {'value': 2.0}},
+            'a': {'doc_count': 1, 'min_price': {'value': 1.0}},
+        }
+        a = a.build_agg_result({'buckets': raw_buckets})
+        self.assertEqual(a.get_bucket('b').doc_count, 2)
+        self.assertEqual([b.key for b in a], ['a', 'b'])
+        self.assertEqual(a.get_bucket('a').get_aggregation('min_price').value, 1.0)
+        self.assertNotIn('key', raw_buckets['a'])
+
+    def _build_histogram_result(self):
+        f = DynamicDocument.fields
+        a = agg.Histogram(
+            f.price, interval=10,
+            aggs={
+                'min_rank': agg.Min(f.rank),
+                'uniq': agg.Cardinality(f.user),
+                'top': agg.TopHits(size=1),
+            }
+        )
+        return a.build_agg_result({
+            'buckets': [
+                {
+                    'key': 0, 'doc_count': 5,
+                    'min_rank': {'value': 1.5}, 'uniq': {'value': 3},
+                    'top': {'hits': {'total': 5, 'max_score': 1, 'hits': []}},
+                },
+                {
+                    'key': 10, 'doc_count': 2,
+                    'min_rank': {'value': None}, 'uniq': {'value': 2},
+                    'top': {'hits': {'total': 2, 'max_score': 1, 'hits': []}},
+                },
+            ]
+        })
+
+    def test_to_columns(self):
+        a = self._build_histogram_result()
+        columns = a.to_columns(use_numpy=False)
+        self.assertEqual(sorted(columns), ['doc_count', 'key', 'min_rank', 'uniq'])
+        self.assertIsInstance(columns['key'], array)
+        self.assertEqual(list(columns['key']), [0, 10])
+        self.assertIsInstance(columns['doc_count'], array)
+        self.assertEqual(list(columns['doc_count']), [5, 2])
+        self.assertEqual(columns['min_rank'].typecode, 'd')
+        self.assertEqual(columns['min_rank'][0], 1.5)
+        self.assertTrue(math.isnan(columns['min_rank'][1]))
+        self.assertEqual(list(columns['uniq']), [3.0, 2.0])
+        self.assertEqual(a._buckets, [None, None])
+
+        f = DynamicDocument.fields
+        a = agg.Terms(f.tags).build_agg_result({
+            'buckets': [{'key': 'a', 'doc_count': 3}, {'key': 'b', 'doc_count': 1}]
+        })
+        columns = a.to_columns(use_numpy=False)
+        self.assertEqual(columns['key'], ['a', 'b'])
+        self.assertEqual(list(columns['doc_count']), [3, 1])
+
+    @unittest.skipIf(not NUMPY_IMPORTED, 'numpy is not installed')
+    def test_to_columns_numpy(self):
+        import numpy
+
+        columns = self._build_histogram_result().to_columns(use_numpy=True)
+        self.assertIsInstance(columns['doc_count'], numpy.ndarray)
+        self.assertEqual(columns['doc_count'].dtype, numpy.int64)
+        self.assertEqual(columns['doc_count'].sum(), 7)
+        self.assertEqual(numpy.nansum(columns['min_rank']), 1.5)
+
+        f = DynamicDocument.fields
+        a = agg.Range(
+            f.price, ranges=[{'to': 10}, {'from': 10, 'to': 20}, {'from': 20}]
+        ).build_agg_result({
+            'buckets': [
+                {'to': 10, 'doc_count': 1},
+                {'from': 10, 'to': 20, 'doc_count': 2},
+                {'from': 20, 'doc_count': 3},
+            ]
+        })
+        columns = a.to_columns(use_numpy=True)
+        self.assertEqual(columns['key'].shape, (3,))
+        self.assertEqual(columns['key'].dtype, object)
+        self.assertEqual(
+            list(columns['key']), [(None, 10), (10, 20), (20, None)]
+        )
+        self.assertEqual(columns['doc_count'].shape, (3,))
+
+        a = agg.Terms(f.tags).build_agg_result({
+            'buckets': [{'key': 'a', 'doc_count': 3}, {'key': 'b', 'doc_count': 1}]
+        })
+        self.assertEqual(list(a.to_columns(use_numpy=True)['key']), ['a', 'b'])
+
     def test_instance_mapper(self):
         class _Gender(object):
             def __init__(self, key, title):
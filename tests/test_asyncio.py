@@ -0,0 +1,349 @@
+import sys
+import json
+import unittest
+
+from mock import MagicMock
+
+from elasticmagic import actions
+from elasticmagic.events import ClusterListener
+from elasticmagic.result import BulkResult
+
+if sys.version_info >= (3, 6):
+    import asyncio
+
+    from elasticmagic.ext.asyncio import AsyncCluster, AsyncIndex, AsyncSearchQuery
+
+
+@unittest.skipIf(sys.version_info < (3, 6), 'asyncio extension requires python 3.6')
+class AsyncClusterTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.client = MagicMock()
+        self.cluster = AsyncCluster(self.client)
+        self.index = self.cluster['test']
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def make_future(self, response):
+        future = self.loop.create_future()
+        future.set_result(response)
+        return future
+
+    def set_response(self, method, response):
+        # stub transport: client methods return futures
+        method.side_effect = lambda *args, **kwargs: self.make_future(response)
+
+    def run_sync(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_search(self):
+        self.set_response(
+            self.client.search,
+            {
+                'hits': {
+                    'hits': [
+                        {
+                            '_id': '381',
+                            '_type': 'product',
+                            '_index': 'test',
+                            '_score': 4.675524,
+                            '_source': {'name': 'LG'},
+                        }
+                    ],
+                    'max_score': 4.675524,
+                    'total': 1
+                }
+            }
+        )
+        self.assertIsInstance(self.index, AsyncIndex)
+        ProductDoc = self.index.product
+        sq = self.index.search_query(ProductDoc.name.match('LG'), routing=123)
+        self.assertIsInstance(sq, AsyncSearchQuery)
+        self.assertRaises(ValueError, lambda: sq.result)
+
+        result = self.run_sync(sq.get_result())
+        self.client.search.assert_called_once_with(
+            index='test',
+            doc_type='product',
+            routing=123,
+            body={'query': {'match': {'name': 'LG'}}},
+        )
+        self.assertIs(sq.result, result)
+        self.assertIs(self.run_sync(sq.get_result()), result)
+        self.assertEqual(self.client.search.call_count, 1)
+        self.assertEqual(result.total, 1)
+        self.assertEqual(list(sq)[0].name, 'LG')
+        self.assertRaises(ValueError, lambda: sq.limit(1).result)
+
+    def test_prefetch_instances(self):
+        self.set_response(
+            self.client.search,
+            {
+                'hits': {
+                    'hits': [
+                        {'_id': '1', '_type': 'product', '_index': 'test', '_score': 1},
+                    ],
+                    'max_score': 1,
+                    'total': 1
+                }
+            }
+        )
+        mapper = MagicMock(return_value={'1': 'product 1'})
+        sq = self.index.search_query(doc_cls=self.index.product) \
+            .with_instance_mapper(mapper)
+        result = self.run_sync(sq.prefetch_instances())
+        self.assertIs(sq.result, result)
+        mapper.assert_called_once_with(['1'])
+        self.assertEqual(result.hits[0].instance, 'product 1')
+
+    def test_single_flight(self):
+        cluster = AsyncCluster(self.client, single_flight=True)
+        response = self.loop.create_future()
+        self.client.search.side_effect = lambda *args, **kwargs: response
+        self.loop.call_soon(
+            response.set_result,
+            {'hits': {'hits': [], 'max_score': 0, 'total': 5}}
+        )
+
+        ProductDoc = cluster['test'].product
+        sq1 = cluster['test'].search_query(ProductDoc.name.match('LG'))
+        sq2 = cluster['test'].search_query(ProductDoc.name.match('LG'))
+        sq3 = cluster['test'].search_query(ProductDoc.name.match('LG')).limit(1)
+        results = self.run_sync(
+            asyncio.gather(sq1.get_result(), sq2.get_result(), sq3.get_result())
+        )
+        self.assertEqual([r.total for r in results], [5, 5, 5])
+        self.assertIsNot(results[0], results[1])
+        self.assertEqual(self.client.search.call_count, 2)
+
+        self.run_sync(sq1.limit(0).get_result())
+        self.assertEqual(self.client.search.call_count, 3)
+
+    def test_listeners(self):
+        events = []
+        listener = ClusterListener()
+        listener.after_request = events.append
+        self.cluster.add_listener(listener)
+
+        self.set_response(
+            self.client.search,
+            {'took': 5, 'hits': {'hits': [], 'max_score': 0, 'total': 0}}
+        )
+        result = self.run_sync(self.index.search_query().get_result())
+        self.set_response(self.client.indices.refresh, {})
+        self.run_sync(self.index.refresh())
+        self.assertEqual([e.operation for e in events], ['search', 'refresh'])
+        self.assertIs(events[0].result, result)
+        self.assertEqual(events[0].took, 5)
+        self.assertGreaterEqual(events[0].transport_time, 0)
+
+    def test_multi_search(self):
+        self.set_response(
+            self.client.msearch,
+            {
+                'responses': [
+                    {'hits': {'hits': [], 'max_score': 0.0, 'total': 27}},
+                    {'hits': {'hits': [], 'max_score': 0.0, 'total': 5}},
+                ]
+            }
+        )
+        sq1 = self.index.search_query()
+        sq2 = self.index.search_query(search_type='count')
+        results = self.run_sync(self.cluster.multi_search([sq1, sq2]))
+        self.assertIs(results[0], sq1.result)
+        self.assertIs(results[1], sq2.result)
+        self.assertEqual(results[1].total, 5)
+
+    def test_count(self):
+        self.set_response(self.client.count, {'count': 12})
+        CarDoc = self.index.car
+        sq = self.index.search_query(CarDoc.status == 0)
+        self.assertEqual(self.run_sync(sq.count()), 12)
+        self.client.count.assert_called_once_with(
+            index='test', doc_type='car', body={'query': {'term': {'status': 0}}}
+        )
+
+    def test_get_and_multi_get(self):
+        self.set_response(
+            self.client.get,
+            {'_id': '1', '_type': 'car', '_index': 'test', '_source': {'vendor': 'Subaru'}}
+        )
+        doc = self.run_sync(self.index.get(1, doc_type='car'))
+        self.assertEqual(doc.vendor, 'Subaru')
+        self.client.get.assert_called_once_with(index='test', id=1, doc_type='car')
+
+        self.set_response(
+            self.client.mget,
+            {
+                'docs': [
+                    {'_id': '1', '_type': 'car', '_index': 'test', 'found': True,
+                     '_source': {'vendor': 'Subaru'}},
+                    {'_id': '2', '_type': 'car', '_index': 'test', 'found': False},
+                ]
+            }
+        )
+        docs = self.run_sync(
+            self.index.multi_get([self.index.car(_id=1), self.index.car(_id=2)])
+        )
+        self.assertEqual(docs[0].vendor, 'Subaru')
+        self.assertIsNone(docs[1])
+
+    def test_bulk_and_scroll(self):
+        self.set_response(
+            self.client.bulk,
+            {
+                'took': 1,
+                'errors': False,
+                'items': [
+                    {'delete': {'_index': 'test', '_type': 'car', '_id': '1', 'status': 200}}
+                ]
+            }
+        )
+        result = self.run_sync(
+            self.index.bulk([actions.Delete(self.index.car(_id=1))])
+        )
+        self.assertFalse(result.errors)
+        self.client.bulk.assert_called_once_with(
+            index='test', body=[{'delete': {'_id': 1, '_type': 'car'}}]
+        )
+
+        self.set_response(
+            self.client.scroll,
+            {'_scroll_id': 'abc', 'hits': {'hits': [], 'max_score': 0.0, 'total': 0}}
+        )
+        result = self.run_sync(self.index.scroll('abc', '1m'))
+        self.assertEqual(result.scroll_id, 'abc')
+        self.client.scroll.assert_called_once_with(scroll_id='abc', scroll='1m')
+
+    def test_streaming_bulk(self):
+        self.set_response(
+            self.client.bulk, {'took': 1, 'errors': False, 'items': []}
+        )
+        docs = (self.index.car(_id=i) for i in range(3))
+        results = self.index.streaming_bulk(docs, chunk_size=2)
+        self.assertIsInstance(self.run_sync(results.__anext__()), BulkResult)
+        self.assertIsInstance(self.run_sync(results.__anext__()), BulkResult)
+        self.assertRaises(StopAsyncIteration, self.run_sync, results.__anext__())
+        self.assertEqual(self.client.bulk.call_count, 2)
+
+    def test_parallel_bulk(self):
+        active = []
+
+        def bulk(body, **params):
+            doc_id = json.loads(body.splitlines()[0])['index']['_id']
+            active.append(doc_id)
+            self.assertLessEqual(len(active), 2)
+            future = self.loop.create_future()
+
+            def done():
+                active.remove(doc_id)
+                future.set_result({
+                    'took': 1,
+                    'errors': False,
+                    'items': [
+                        {'index': {
+                            '_index': 'test', '_type': 'car', '_id': doc_id,
+                            '_version': 1, 'status': 201
+                        }}
+                    ]
+                })
+            # later chunks are faster
+            self.loop.call_later(0.01 - doc_id * 0.001, done)
+            return future
+
+        self.client.bulk.side_effect = bulk
+        docs = (self.index.car(_id=i) for i in range(1, 6))
+        results = self.index.parallel_bulk(docs, concurrency=2, chunk_size=1)
+        ids = []
+        for _ in range(5):
+            ids.append(self.run_sync(results.__anext__()).items[0]._id)
+        self.assertEqual(ids, [1, 2, 3, 4, 5])
+        self.assertRaises(StopAsyncIteration, self.run_sync, results.__anext__())
+
+    def test_scan(self):
+        def page(scroll_id, *ids):
+            return {
+                '_scroll_id': scroll_id,
+                'hits': {
+                    'total': 3,
+                    'max_score': 0,
+                    'hits': [
+                        {'_id': str(i), '_type': 'car', '_index': 'test',
+                         '_score': 0, '_source': {'rank': i}}
+                        for i in ids
+                    ]
+                }
+            }
+
+        self.set_response(self.client.search, page('s1', 1, 2))
+        pages = iter([page('s2', 3), page('s3')])
+        self.client.scroll.side_effect = lambda **kw: self.make_future(next(pages))
+        self.set_response(self.client.clear_scroll, {})
+
+        docs = self.index.search_query(doc_cls=self.index.car).scan()
+        ranks = []
+        while True:
+            try:
+                ranks.append(self.run_sync(docs.__anext__()).rank)
+            except StopAsyncIteration:
+                break
+        self.assertEqual(ranks, [1, 2, 3])
+        self.client.clear_scroll.assert_called_once_with(scroll_id='s3')
+
+    def test_sliced_scan(self):
+        def page(scroll_id, *ids):
+            return {
+                '_scroll_id': scroll_id,
+                'hits': {
+                    'total': 4,
+                    'max_score': 0,
+                    'hits': [
+                        {'_id': str(i), '_type': 'car', '_index': 'test',
+                         '_score': 0, '_source': {'rank': i}}
+                        for i in ids
+                    ]
+                }
+            }
+
+        self.client.search.side_effect = lambda body, **params: self.make_future(
+            page('{}'.format(body['slice']['id']), body['slice']['id'] * 10 + 1)
+        )
+        self.client.scroll.side_effect = lambda scroll_id, scroll: self.make_future(
+            page(scroll_id + '-end')
+        )
+        self.set_response(self.client.clear_scroll, {})
+
+        sq = self.index.search_query(doc_cls=self.index.car)
+        docs = sq.sliced_scan(2)
+        ranks = []
+        while True:
+            try:
+                ranks.append(self.run_sync(docs.__anext__()).rank)
+            except StopAsyncIteration:
+                break
+        self.assertEqual(sorted(ranks), [1, 11])
+        self.assertEqual(self.client.clear_scroll.call_count, 2)
+
+        def collect(slice_sq, docs):
+            ranks = []
+            result = self.loop.create_future()
+
+            def step(fut=None):
+                if fut is not None:
+                    try:
+                        ranks.append(fut.result().rank)
+                    except StopAsyncIteration:
+                        result.set_result(ranks)
+                        return
+                asyncio.ensure_future(docs.__anext__()).add_done_callback(step)
+
+            step()
+            return result
+
+        self.assertEqual(
+            self.run_sync(sq.sliced_scan(2, callback=collect)),
+            [[1], [11]]
+        )
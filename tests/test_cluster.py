@@ -1,11 +1,17 @@
 import re
+import json
+import datetime
+import threading
 import warnings
-from mock import MagicMock
+from mock import MagicMock, patch
 
 from elasticmagic import (
-    actions, agg, Cluster, DynamicDocument, Index, SearchQuery
+    actions, agg, BulkRetry, Cluster, DynamicDocument, Index, SearchQuery
 )
 from elasticmagic import DelayedElasticsearchException, MultiSearchError
+from elasticmagic.cache import MemoryResultCache, SingleFlight
+from elasticmagic.events import ClusterListener
+from elasticmagic.serializer import JSONSerializer, get_default_serializer
 
 from .base import BaseTestCase
 
@@ -219,6 +225,271 @@ class ClusterTest(BaseTestCase):
         self.assertRaisesRegexp(DelayedElasticsearchException, r'^SearchPhaseExecutionException', lambda: results[1].hits)
         self.assertRaises(AttributeError, lambda: results[1].unknown_attr)
 
+    def test_batch(self):
+        def msearch(body):
+            return {
+                'responses': [
+                    {
+                        'hits': {
+                            'total': i + 1,
+                            'max_score': 0,
+                            'hits': []
+                        }
+                    }
+                    for i in range(len(body) // 2)
+                ]
+            }
+
+        self.client.msearch = MagicMock(side_effect=msearch)
+        self.client.search = MagicMock()
+
+        ProductDoc = self.index.product
+        sq1 = self.index.search_query(doc_cls=ProductDoc)
+        sq2 = self.index.search_query(doc_cls=ProductDoc).limit(0)
+        sq3 = self.cluster.search_query(doc_cls=ProductDoc).filter(ProductDoc.status == 0)
+        with self.cluster.batch() as batch:
+            sq1, sq2 = batch.add(sq1, sq2)
+            batch.add(sq3)
+            self.assertEqual(len(batch), 3)
+            self.assertEqual(self.client.msearch.call_count, 0)
+
+            self.assertEqual(sq2.result.total, 2)
+            self.assertEqual(self.client.msearch.call_count, 1)
+            self.assertEqual(len(self.client.msearch.call_args[1]['body']), 6)
+            self.assertEqual(sq1.result.total, 1)
+            self.assertEqual(sq3.result.total, 3)
+            self.assertEqual(len(batch), 0)
+
+            # queries with result are not batched again
+            batch.add(sq1)
+            sq4 = batch.add(sq1.limit(1))
+        self.assertEqual(self.client.msearch.call_count, 2)
+        self.assertEqual(len(self.client.msearch.call_args[1]['body']), 2)
+        self.assertEqual(sq4.result.total, 1)
+
+        # queries outside of a batch are sent as usual
+        self.client.search.return_value = {
+            'hits': {'total': 5, 'max_score': 0, 'hits': []}
+        }
+        self.assertEqual(sq1.limit(2).result.total, 5)
+        self.assertEqual(self.client.search.call_count, 1)
+        self.assertEqual(self.client.msearch.call_count, 2)
+
+    def test_single_flight(self):
+        followers = {'count': 0, 'expected': 0}
+        followers_joined = threading.Event()
+        lock = threading.Lock()
+
+        class _SingleFlight(SingleFlight):
+            def _wait(self, call):
+                with lock:
+                    followers['count'] += 1
+                    if followers['count'] == followers['expected']:
+                        followers_joined.set()
+                super(_SingleFlight, self)._wait(call)
+
+        class _Cluster(Cluster):
+            _single_flight_cls = _SingleFlight
+
+        cluster = _Cluster(self.client, single_flight=True)
+        started = threading.Event()
+
+        def search(**params):
+            started.set()
+            # leader responds only when all followers wait for it
+            followers_joined.wait(5)
+            if params.get('routing') == 'fail':
+                raise ValueError('failed')
+            return {'hits': {'total': 7, 'max_score': 0, 'hits': []}}
+
+        self.client.search = MagicMock(side_effect=search)
+        ProductDoc = self.index.product
+
+        def run(routing=None):
+            sq = cluster['test'].search_query(doc_cls=ProductDoc, routing=routing)
+            try:
+                results.append(sq.result)
+            except ValueError as e:
+                results.append(e)
+
+        for routing, count in [(None, 7), ('fail', 7)]:
+            started.clear()
+            followers_joined.clear()
+            followers.update(count=0, expected=count - 1)
+            results = []
+            threads = [threading.Thread(target=run, args=(routing,))]
+            threads[0].start()
+            started.wait(5)
+            for _ in range(count - 1):
+                threads.append(threading.Thread(target=run, args=(routing,)))
+                threads[-1].start()
+            for t in threads:
+                t.join()
+            self.assertEqual(len(results), count)
+            if routing is None:
+                self.assertEqual(self.client.search.call_count, 1)
+                self.assertEqual(set(r.total for r in results), {7})
+                self.assertEqual(len(set(id(r) for r in results)), count)
+            else:
+                self.assertEqual(self.client.search.call_count, 2)
+                self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+        self.assertEqual(cluster._single_flight._calls, {})
+        followers_joined.set()
+        cluster['test'].search_query(doc_cls=ProductDoc).result
+        self.assertEqual(self.client.search.call_count, 3)
+
+    def test_listeners(self):
+        class Listener(ClusterListener):
+            def __init__(self):
+                self.calls = []
+
+            def before_request(self, event):
+                self.calls.append(('before', event.operation, event.transport_time))
+
+            def after_request(self, event):
+                self.calls.append(('after', event.operation, event))
+
+        listener = Listener()
+        cluster = Cluster(
+            self.client, serializer=JSONSerializer(), listeners=[listener]
+        )
+        index = Index(cluster, 'test')
+
+        self.client.search = MagicMock(
+            return_value={
+                'took': 12,
+                'hits': {
+                    'total': 10,
+                    'max_score': 1,
+                    'hits': [
+                        {'_id': '1', '_type': 'product', '_index': 'test', '_score': 1}
+                    ]
+                }
+            }
+        )
+        result = index.search_query(index.product.status == 0).result
+        self.assertEqual(
+            [c[:2] for c in listener.calls],
+            [('before', 'search'), ('after', 'search')]
+        )
+        self.assertIsNone(listener.calls[0][2])
+        event = listener.calls[1][2]
+        self.assertIs(event.result, result)
+        self.assertIsNone(event.error)
+        self.assertEqual(event.took, 12)
+        self.assertEqual(event.hits_count, 1)
+        self.assertEqual(
+            event.request_size,
+            len('{"query":{"term":{"status":0}}}')
+        )
+        self.assertEqual(event.params['index'], 'test')
+        for t in (event.compile_time, event.transport_time, event.result_time):
+            self.assertGreaterEqual(t, 0)
+        self.assertAlmostEqual(
+            event.duration,
+            event.compile_time + event.transport_time + event.result_time
+        )
+
+        listener.calls = []
+        self.client.bulk = MagicMock(
+            return_value={
+                'took': 3, 'errors': False,
+                'items': [
+                    {'index': {'_index': 'test', '_type': 'product', '_id': '1', 'status': 201}}
+                ]
+            }
+        )
+        index.bulk([actions.Index(index.product(_id=1))])
+        self.client.count = MagicMock(side_effect=ValueError('connection failed'))
+        self.assertRaises(ValueError, lambda: index.count(None))
+        self.assertEqual(
+            [c[:2] for c in listener.calls],
+            [
+                ('before', 'bulk'), ('after', 'bulk'),
+                ('before', 'count'), ('after', 'count'),
+            ]
+        )
+        self.assertEqual(listener.calls[1][2].hits_count, 1)
+        event = listener.calls[3][2]
+        self.assertIsInstance(event.error, ValueError)
+        self.assertIsNone(event.result)
+        self.assertIsNone(event.result_time)
+
+        cluster.remove_listener(listener)
+        index.search_query().result
+        self.assertEqual(len(listener.calls), 4)
+
+    def test_result_cache(self):
+        now = [0]
+        cache = MemoryResultCache(maxsize=2, ttl=60, timer=lambda: now[0])
+        cluster = Cluster(self.client, result_cache=cache)
+        index = Index(cluster, 'test')
+
+        def response(total):
+            return {'hits': {'total': total, 'max_score': 0, 'hits': []}}
+
+        self.client.search = MagicMock(return_value=response(1))
+        ProductDoc = index.product
+        sq = index.search_query(doc_cls=ProductDoc).filter(ProductDoc.status == 0)
+
+        self.assertEqual(sq.result.total, 1)
+        # equal query built in another order hits the cache
+        sq2 = index.search_query(ProductDoc.status == 0, doc_cls=ProductDoc) \
+            .filter(ProductDoc.status == 0).query(None)
+        self.assertEqual(sq2.result.total, 1)
+        self.assertIsNot(sq2.result, sq.result)
+        self.assertEqual(self.client.search.call_count, 1)
+        self.assertEqual(len(cache), 1)
+
+        # other search params
+        sq.with_routing(1).result
+        self.assertEqual(self.client.search.call_count, 2)
+        # disabled per query
+        sq.with_result_cache(False).result
+        self.assertEqual(self.client.search.call_count, 3)
+
+        # per query ttl
+        sq.limit(1).with_result_cache(ttl=10).result
+        self.assertEqual(self.client.search.call_count, 4)
+        now[0] = 20
+        sq.limit(1).result
+        self.assertEqual(self.client.search.call_count, 5)
+        # lru eviction
+        self.assertEqual(len(cache), 2)
+        index.search_query(doc_cls=ProductDoc).filter(ProductDoc.status == 0).result
+        self.assertEqual(self.client.search.call_count, 6)
+
+        # cached entries are shared with multi search
+        self.client.msearch = MagicMock(
+            return_value={'responses': [response(3)]}
+        )
+        sq3 = index.search_query(doc_cls=ProductDoc).limit(3)
+        results = cluster.multi_search([sq.limit(1), sq3])
+        self.assertEqual([r.total for r in results], [1, 3])
+        self.assertEqual(
+            len(self.client.msearch.call_args[1]['body']), 2
+        )
+        results = index.multi_search([sq.limit(1), sq3])
+        self.assertEqual([r.total for r in results], [1, 3])
+        self.assertEqual(self.client.msearch.call_count, 1)
+        sq3.result
+        self.assertEqual(self.client.search.call_count, 6)
+
+        # expired entries are not returned
+        now[0] = 100
+        sq3.limit(3).result
+        self.assertEqual(self.client.search.call_count, 7)
+
+        # errors are not cached
+        self.client.msearch = MagicMock(
+            return_value={'responses': [{'error': 'failed'}]}
+        )
+        sq4 = sq3.limit(4)
+        cluster.multi_search([sq4], raise_on_error=False)
+        cluster.multi_search([sq4], raise_on_error=False)
+        self.assertEqual(self.client.msearch.call_count, 2)
+
     def test_scroll(self):
         self.client.scroll = MagicMock(
             return_value={
@@ -553,3 +824,234 @@ class ClusterTest(BaseTestCase):
             cluster['test'].search_query().source(None),
             {}
         )
+
+    def test_serializer(self):
+        self.assertIsInstance(get_default_serializer(), JSONSerializer)
+
+        cluster = Cluster(self.client, serializer=JSONSerializer())
+        self.client.search = MagicMock(
+            return_value={'hits': {'hits': [], 'max_score': 0.0, 'total': 0}}
+        )
+        self.client.msearch = MagicMock(
+            return_value={
+                'responses': [
+                    {'hits': {'hits': [], 'max_score': 0.0, 'total': 0}},
+                ]
+            }
+        )
+        self.client.bulk = MagicMock(return_value={'took': 1, 'errors': False, 'items': []})
+
+        ProductDoc = self.index.product
+        sq = (
+            cluster.search_query(doc_cls=ProductDoc)
+            .filter(ProductDoc.created_at >= datetime.datetime(2016, 1, 1))
+            .limit(1)
+        )
+        body = {
+            'query': {
+                'filtered': {
+                    'filter': {
+                        'range': {'created_at': {'gte': '2016-01-01T00:00:00'}}
+                    }
+                }
+            },
+            'size': 1
+        }
+        cluster.search(sq)
+        serialized = self.client.search.call_args[1]['body']
+        self.assertNotIn(' ', serialized)
+        self.assertEqual(json.loads(serialized), body)
+
+        cluster.multi_search([sq.with_search_params(routing=123)])
+        serialized = self.client.msearch.call_args[1]['body']
+        self.assertTrue(serialized.endswith('\n'))
+        self.assertEqual(
+            [json.loads(line) for line in serialized.splitlines()],
+            [{'type': 'product', 'routing': 123}, body]
+        )
+
+        cluster.bulk([actions.Delete(ProductDoc(_id=1))], index='test')
+        serialized = self.client.bulk.call_args[1]['body']
+        self.assertEqual(
+            [json.loads(line) for line in serialized.splitlines()],
+            [{'delete': {'_id': 1, '_type': 'product'}}]
+        )
+
+    def test_streaming_bulk(self):
+        self.client.bulk = MagicMock(
+            return_value={'took': 1, 'errors': False, 'items': []}
+        )
+        CarDoc = self.index.car
+        consumed = []
+
+        def gen_docs():
+            for i in range(5):
+                consumed.append(i)
+                yield CarDoc(_id=i, vendor='Subaru')
+
+        results = self.cluster.streaming_bulk(gen_docs(), chunk_size=2, index='test')
+        self.assertEqual(consumed, [])
+        next(results)
+        self.assertEqual(consumed, [0, 1, 2])
+        self.assertEqual(len(list(results)), 2)
+        self.assertEqual(self.client.bulk.call_count, 3)
+        body = self.client.bulk.call_args[1]['body']
+        self.assertEqual(
+            [json.loads(line) for line in body.splitlines()],
+            [
+                {'index': {'_id': 4, '_type': 'car'}},
+                {'vendor': 'Subaru'},
+            ]
+        )
+
+        self.client.bulk.reset_mock()
+        acts = [
+            actions.Index(CarDoc(_id=1, vendor='Subaru' * 10)),
+            actions.Delete(CarDoc(_id=2)),
+            actions.Delete(CarDoc(_id=3)),
+        ]
+        results = list(
+            self.index.streaming_bulk(acts, max_chunk_bytes=100, refresh=True)
+        )
+        self.assertEqual(len(results), 2)
+        self.assertEqual(self.client.bulk.call_count, 2)
+        first_body = self.client.bulk.call_args_list[0][1]['body']
+        self.assertGreater(len(first_body), 100)
+        self.assertEqual(len(first_body.splitlines()), 2)
+        params = self.client.bulk.call_args[1]
+        self.assertEqual(params['index'], 'test')
+        self.assertEqual(params['refresh'], True)
+        self.assertEqual(len(params['body'].splitlines()), 2)
+
+    def test_parallel_bulk(self):
+        lock = threading.Lock()
+        stats = {'active': 0, 'max_active': 0, 'done': 0}
+        all_active = threading.Event()
+        first_chunks_done = threading.Event()
+
+        def bulk(body, **params):
+            doc_id = json.loads(body.splitlines()[0])['index']['_id']
+            with lock:
+                stats['active'] += 1
+                stats['max_active'] = max(stats['max_active'], stats['active'])
+                if stats['active'] == 3:
+                    all_active.set()
+            if doc_id <= 3:
+                # the first chunks are sent at once, timeouts only
+                # prevent hanging when they are not
+                all_active.wait(5)
+            if doc_id == 1:
+                # and the first one finishes last
+                first_chunks_done.wait(5)
+            with lock:
+                stats['active'] -= 1
+                if doc_id in (2, 3):
+                    stats['done'] += 1
+                    if stats['done'] == 2:
+                        first_chunks_done.set()
+            return {
+                'took': 1,
+                'errors': False,
+                'items': [
+                    {'index': {
+                        '_index': 'test', '_type': 'car', '_id': doc_id,
+                        '_version': 1, 'status': 201
+                    }}
+                ]
+            }
+
+        self.client.bulk = MagicMock(side_effect=bulk)
+        consumed = []
+
+        def gen_docs():
+            for i in range(1, 13):
+                consumed.append(i)
+                yield self.index.car(_id=i)
+
+        results = self.index.parallel_bulk(
+            gen_docs(), concurrency=3, queue_size=1, chunk_size=1
+        )
+        first = next(results)
+        self.assertEqual(first.items[0]._id, 1)
+        # backpressure: running and queued chunks, the next chunk
+        # and one document read ahead by the chunker
+        self.assertLessEqual(len(consumed), 3 + 1 + 2)
+        ids = [first.items[0]._id] + [r.items[0]._id for r in results]
+        self.assertEqual(ids, list(range(1, 13)))
+        self.assertEqual(self.client.bulk.call_count, 12)
+        self.assertTrue(all_active.is_set())
+        self.assertTrue(first_chunks_done.is_set())
+        self.assertEqual(stats['max_active'], 3)
+
+    def test_bulk_retry(self):
+        def item(doc_id, status, error=None):
+            data = {
+                '_index': 'test', '_type': 'car', '_id': doc_id,
+                '_version': 1, 'status': status,
+            }
+            if error:
+                data['error'] = error
+            return {'index': data}
+
+        responses = [
+            {
+                'took': 3, 'errors': True,
+                'items': [
+                    item('1', 201),
+                    item('2', 429, 'EsRejectedExecutionException'),
+                    item('3', 400, 'MapperParsingException'),
+                    item('4', 503, 'UnavailableShardsException'),
+                ]
+            },
+            {
+                'took': 2, 'errors': True,
+                'items': [
+                    item('2', 201),
+                    item('4', 429, 'EsRejectedExecutionException'),
+                ]
+            },
+            {
+                'took': 1, 'errors': False,
+                'items': [
+                    item('4', 201),
+                ]
+            },
+        ]
+        self.client.bulk = MagicMock(side_effect=responses)
+        sleeps = []
+        retry = BulkRetry(max_retries=3, initial_backoff=0.5, jitter=False)
+        docs = [self.index.car(_id=i) for i in range(1, 5)]
+        with patch('time.sleep', sleeps.append):
+            result = self.index.bulk(docs, retry=retry)
+
+        self.assertEqual(self.client.bulk.call_count, 3)
+        self.assertEqual(sleeps, [0.5, 1.0])
+        bodies = [c[1]['body'] for c in self.client.bulk.call_args_list]
+        self.assertEqual(
+            [[json.loads(line)['index']['_id'] for line in body.splitlines()[::2]]
+             for body in bodies],
+            [[1, 2, 3, 4], [2, 4], [4]]
+        )
+        self.assertEqual(len(result.attempts), 3)
+        self.assertEqual([r.took for r in result.attempts], [3, 2, 1])
+        self.assertEqual(result.took, 6)
+        self.assertTrue(result.errors)
+        self.assertEqual([i.status for i in result.items], [201, 201, 400, 201])
+        self.assertEqual(result.items[2].error, 'MapperParsingException')
+
+        # retries are limited
+        self.client.bulk = MagicMock(
+            return_value={'took': 1, 'errors': True, 'items': [item('1', 429, 'Rejected')]}
+        )
+        with patch('time.sleep', sleeps.append):
+            results = list(
+                self.index.streaming_bulk(
+                    docs[:1], retry=BulkRetry(max_retries=2, initial_backoff=0.5)
+                )
+            )
+        self.assertEqual(self.client.bulk.call_count, 3)
+        self.assertEqual(results[0].items[0].status, 429)
+        self.assertEqual(len(results[0].attempts), 3)
+        self.assertTrue(0 <= sleeps[2] <= 0.5)
+        self.assertTrue(0 <= sleeps[3] <= 1.0)
+        self.assertEqual(BulkRetry(max_backoff=5, jitter=False).get_backoff(10), 5)
@@ -529,6 +529,156 @@ class DocumentTestCase(BaseTestCase):
         self.assert_expression(DynamicDocument.group.name.raw, 'group.name.raw')
         self.assertEqual(collect_doc_classes(DynamicDocument.group.name.raw), {DynamicDocument})
 
+    def test_source_decoder(self):
+        class ProductDocument(Document):
+            name = Field('product_name', String)
+            price = Field(Float)
+
+        decoder = ProductDocument._get_source_decoder()
+        self.assertIs(ProductDocument._get_source_decoder(), decoder)
+
+        doc = ProductDocument(
+            _hit={
+                '_id': '1',
+                '_score': 2.0,
+                '_source': {'product_name': 'Tomato', 'price': '1.5', 'color': 'red'},
+            }
+        )
+        self.assertEqual(doc._id, '1')
+        self.assertEqual(doc._score, 2.0)
+        self.assertIsNone(doc._index)
+        self.assertEqual(doc.name, 'Tomato')
+        self.assertEqual(doc.price, 1.5)
+        self.assertEqual(doc.color, 'red')
+
+        ProductDocument.color = Field(String)
+        self.assertIsNot(ProductDocument._get_source_decoder(), decoder)
+        doc = ProductDocument(_hit={'_source': {'color': 42}})
+        self.assertEqual(doc.color, '42')
+
+        doc = DynamicDocument(
+            _hit={
+                '_id': '2',
+                '_source': {'name': 'Tomato', 'group': {'id': 1}},
+            }
+        )
+        self.assertEqual(doc.name, 'Tomato')
+        self.assertIsInstance(doc.group, DynamicDocument)
+        self.assertEqual(doc.group.id, 1)
+
+        class LowerCaseDocument(ProductDocument):
+            def _process_source_key_value(self, key, value):
+                key, value = super(LowerCaseDocument, self) \
+                    ._process_source_key_value(key, value)
+                if isinstance(value, string_types):
+                    value = value.lower()
+                return key, value
+
+        doc = LowerCaseDocument(
+            _hit={'_source': {'product_name': 'Tomato', 'price': 2, 'color': 'RED'}}
+        )
+        self.assertEqual(doc.name, 'tomato')
+        self.assertEqual(doc.price, 2.0)
+        self.assertEqual(doc.color, 'red')
+
+        class DynamicLowerCaseDocument(DynamicDocument):
+            def _process_source_key_value(self, key, value):
+                if key == 'name':
+                    value = value.lower()
+                return super(DynamicLowerCaseDocument, self) \
+                    ._process_source_key_value(key, value)
+
+        doc = DynamicLowerCaseDocument(
+            _hit={'_source': {'name': 'Tomato', 'group': {'id': 1}}}
+        )
+        self.assertEqual(doc.name, 'tomato')
+        self.assertIsInstance(doc.group, DynamicDocument)
+        self.assertEqual(doc.group.id, 1)
+
+    def test_compact_document(self):
+        CompactTestDocument = TestDocument.get_compact_cls()
+        self.assertIs(TestDocument.get_compact_cls(), CompactTestDocument)
+        self.assertIs(CompactTestDocument.get_compact_cls(), CompactTestDocument)
+        self.assertTrue(issubclass(CompactTestDocument, TestDocument))
+        self.assertEqual(CompactTestDocument.__name__, 'CompactTestDocument')
+        self.assertEqual(
+            list(CompactTestDocument.fields.keys()),
+            list(TestDocument.fields.keys())
+        )
+        self.assertIsInstance(CompactTestDocument.status, AttributedField)
+        self.assert_expression(
+            CompactTestDocument.status == 1,
+            {'term': {'status': 1}}
+        )
+        self.assert_expression(CompactTestDocument.group.name, 'group.test_name')
+        self.assertEqual(
+            collect_doc_classes(CompactTestDocument.status),
+            {CompactTestDocument}
+        )
+
+        doc = CompactTestDocument(
+            _hit={
+                '_id': '123',
+                '_index': 'test',
+                '_type': 'test',
+                '_score': 1.5,
+                '_source': {
+                    'test_name': 'Test name',
+                    'status': '0',
+                    'group': {'id': 1, 'name': 'Test group'},
+                    'i_attr_1': 11,
+                    'unknown': 'value',
+                },
+            }
+        )
+        self.assertEqual(doc._id, '123')
+        self.assertEqual(doc._index, 'test')
+        self.assertAlmostEqual(doc._score, 1.5)
+        self.assertEqual(doc.name, 'Test name')
+        self.assertEqual(doc.status, 0)
+        self.assertIsInstance(doc.group, GroupDocument)
+        self.assertEqual(doc.group.name, 'Test group')
+        self.assertEqual(doc.i_attr_1, 11)
+        self.assertEqual(doc.unknown, 'value')
+        self.assertIsNone(doc.price)
+        self.assertIsNone(doc.unused)
+        self.assertEqual(doc.__dict__, {'i_attr_1': 11, 'unknown': 'value'})
+
+        doc.price = 9.99
+        self.assertAlmostEqual(doc.price, 9.99)
+        self.assertNotIn('price', doc.__dict__)
+        self.assertEqual(
+            doc.to_meta(),
+            {'_id': '123', '_index': 'test', '_type': 'test'}
+        )
+        self.assertEqual(
+            doc.to_source(),
+            {
+                'test_name': 'Test name',
+                'status': 0,
+                'group': {'id': 1, 'test_name': 'Test group'},
+                'price': 9.99,
+                'i_attr_1': 11,
+            }
+        )
+
+        doc = CompactTestDocument(name='Test', status=1)
+        self.assertIsNone(doc._id)
+        self.assertIsNone(doc.group)
+        self.assertEqual(doc.to_source(), {'test_name': 'Test', 'status': 1})
+
+        class ProductDocument(Document):
+            name = Field(String)
+
+        CompactProductDocument = ProductDocument.get_compact_cls()
+        ProductDocument.price = Field(Float)
+        self.assertIsNot(ProductDocument.get_compact_cls(), CompactProductDocument)
+        CompactProductDocument = ProductDocument.get_compact_cls()
+        self.assertIs(ProductDocument.get_compact_cls(), CompactProductDocument)
+        doc = CompactProductDocument(_hit={'_source': {'name': 'Tomato', 'price': '1.5'}})
+        self.assertEqual(doc.price, 1.5)
+        self.assertEqual(doc.__dict__, {})
+
     def test_to_mapping(self):
         class ProductGroupDocument(Document):
             __doc_type__ = 'product_group'
@@ -6,6 +6,7 @@ from elasticmagic import (
     SpanFirst, SpanMulti, SpanNear, SpanNot, SpanOr, SpanTerm, 
     Nested, HasParent, HasChild,
 )
+from elasticmagic.compiler import QueryCompiled
 from elasticmagic.expression import BooleanExpression
 from elasticmagic.types import (
     Type, String, Integer, List, GeoPoint, Completion,
@@ -968,3 +969,78 @@ class ExpressionTestCase(BaseTestCase):
                 }
             }
         )
+
+    def test_compiled_dispatch_table(self):
+        class CustomCompiled(QueryCompiled):
+            def visit_field_query(self, expr):
+                return 'custom'
+
+        f = DynamicDocument.fields
+        expr = Bool.must(f.name == 'Alice', Terms(f.status, [0, 1]))
+
+        self.assertEqual(
+            QueryCompiled(expr).params,
+            {
+                "bool": {
+                    "must": [
+                        {"term": {"name": "Alice"}},
+                        {"terms": {"status": [0, 1]}}
+                    ]
+                }
+            }
+        )
+        def get_func(method):
+            return getattr(method, '__func__', method)
+
+        table = QueryCompiled._get_dispatch_table()
+        self.assertIs(table[Bool], get_func(QueryCompiled.visit_query_expression))
+        self.assertIs(table[Params], get_func(QueryCompiled.visit_params))
+        self.assertIs(table[list], get_func(QueryCompiled.visit_list))
+        self.assertIs(QueryCompiled._get_dispatch_table(), table)
+        self.assertIsNot(CustomCompiled._get_dispatch_table(), table)
+        self.assertEqual(
+            QueryCompiled([f.name, {'a': [1, 'b', None]}]).params,
+            ['name', {'a': [1, 'b', None]}]
+        )
+        self.assertEqual(CustomCompiled(f.name == 'Alice').params, 'custom')
+
+    def test_fingerprint(self):
+        f = DynamicDocument.fields
+
+        expr = Bool.must(f.name == 'Alice', Terms(f.status, [0, 1]))
+        fp = expr.fingerprint()
+        self.assertEqual(len(fp), 40)
+        self.assertIs(expr.fingerprint(), fp)
+        self.assertEqual(
+            Bool.must(f.name == 'Alice', Terms(f.status, [0, 1])).fingerprint(),
+            fp
+        )
+        self.assertEqual(
+            Params(b=1, a={'y': 2, 'x': 1}).fingerprint(),
+            Params(a={'x': 1, 'y': 2}, b=1).fingerprint()
+        )
+        self.assertNotEqual(
+            Bool.must(f.name == 'Bob', Terms(f.status, [0])).fingerprint(),
+            fp
+        )
+        self.assertEqual(
+            Bool.must(f.name == 'Bob', Terms(f.status, [0])).fingerprint(normalize=True),
+            expr.fingerprint(normalize=True)
+        )
+        self.assertNotEqual(
+            Bool.must(f.title == 'Bob', Terms(f.status, [0])).fingerprint(normalize=True),
+            expr.fingerprint(normalize=True)
+        )
+        self.assertNotEqual(
+            Exists(f.name).fingerprint(normalize=True),
+            Exists(f.title).fingerprint(normalize=True)
+        )
+        self.assertNotEqual(
+            MultiMatch('Bob', [f.name, f.title]).fingerprint(normalize=True),
+            MultiMatch('Bob', [f.name]).fingerprint(normalize=True)
+        )
+        # memoized fingerprints do not affect cache key of expression
+        self.assertEqual(
+            expr._get_cache_key(),
+            Bool.must(f.name == 'Alice', Terms(f.status, [0, 1]))._get_cache_key()
+        )
@@ -0,0 +1,106 @@
+import functools
+
+from mock import Mock
+
+from elasticmagic import agg, Document, DynamicDocument, InstanceLoader
+from elasticmagic.cache import MemoryResultCache
+
+from .base import BaseTestCase
+
+
+def load_names(ids):
+    return {id: 'name {}'.format(id) for id in ids}
+
+
+class InstanceLoaderTest(BaseTestCase):
+    def test_instance_loader(self):
+        class _User(object):
+            def __init__(self, id):
+                self.id = id
+
+        def load_users(ids):
+            return {id: _User(id) for id in ids if id != 404}
+
+        class UserDocument(Document):
+            __doc_type__ = 'user'
+
+        load_users = Mock(side_effect=load_users)
+        cache = MemoryResultCache()
+
+        f = DynamicDocument.fields
+        terms_agg = agg.Terms(
+            f.user_id,
+            instance_mapper=InstanceLoader(
+                load_users, cache=cache, batch_size=2, key_prefix='user:'
+            ),
+            aggs={
+                'top': agg.TopHits(
+                    size=1,
+                    instance_mapper=InstanceLoader(
+                        load_users, cache=cache, key_prefix='user:'
+                    ),
+                ),
+            }
+        )
+        raw_data = {
+            'buckets': [
+                {
+                    'key': key,
+                    'doc_count': 1,
+                    'top': {
+                        'hits': {
+                            'total': 1,
+                            'max_score': 1,
+                            'hits': [{'_id': key, '_type': 'user', '_score': 1}]
+                        }
+                    }
+                }
+                for key in [1, 2, 3, 404]
+            ]
+        }
+        doc_cls_map = {'user': UserDocument}
+        a = terms_agg.build_agg_result(raw_data, doc_cls_map)
+        self.assertEqual(a.buckets[0].instance.id, 1)
+        self.assertIsNone(a.buckets[3].instance)
+        self.assertEqual(
+            [c[0][0] for c in load_users.call_args_list], [[1, 2], [3, 404]]
+        )
+        self.assertEqual(len(cache), 3)
+
+        # second request hits the cache, top hits share instances with buckets
+        load_users.reset_mock()
+        loader = InstanceLoader(load_users, cache=cache, key_prefix='user:')
+        terms_agg = terms_agg.aggs({'top': agg.TopHits(size=1, instance_mapper=loader)})
+        a = terms_agg.build_agg_result(raw_data, doc_cls_map)
+        top_hits = a.buckets[1].get_aggregation('top')
+        self.assertIs(top_hits.hits[0].instance, a.buckets[1].instance)
+        self.assertIs(loader.get(2), a.buckets[1].instance)
+        self.assertIsNone(a.buckets[3].get_aggregation('top').hits[0].instance)
+        self.assertEqual([c[0][0] for c in load_users.call_args_list], [[404], [404]])
+
+        load_users.reset_mock()
+        self.assertEqual(list(loader([1, 2, 2])), [1, 2])
+        load_users.assert_not_called()
+        loader.clear()
+        self.assertIsNone(loader.get(1))
+
+    def test_key_prefix(self):
+        cache = MemoryResultCache()
+        loader = InstanceLoader(load_names, cache=cache)
+        self.assertEqual(loader.key_prefix, 'tests.test_loader.load_names:')
+        self.assertEqual(loader([1]), {1: 'name 1'})
+        self.assertEqual(cache.get('tests.test_loader.load_names:1'), 'name 1')
+
+        self.assertRaises(
+            ValueError, InstanceLoader, lambda ids: {}, cache=cache
+        )
+        self.assertRaises(
+            ValueError, InstanceLoader, functools.partial(load_names), cache=cache
+        )
+        # prefix is used only for the cache
+        self.assertEqual(InstanceLoader(lambda ids: {1: 'a'})([1]), {1: 'a'})
+
+        load_a = InstanceLoader(lambda ids: {1: 'a'}, cache=cache, key_prefix='a:')
+        load_b = InstanceLoader(lambda ids: {1: 'b'}, cache=cache, key_prefix='b:')
+        self.assertEqual(load_a([1]), {1: 'a'})
+        self.assertEqual(load_b([1]), {1: 'b'})
@@ -1,7 +1,7 @@
 from mock import MagicMock
 
 from elasticmagic.ext.pagination import SearchQueryWrapper
-from elasticmagic.ext.pagination.flask import Pagination
+from elasticmagic.ext.pagination.flask import Pagination, SearchAfterPagination
 
 from .base import BaseTestCase
 
@@ -44,3 +44,36 @@ class FlaskPaginationTest(BaseTestCase):
             self.assertEqual(page, check_page)
 
         self.assertEqual(self.client.search.call_count, 1)
+
+    def test_search_after_pagination(self):
+        def search(body, **params):
+            after = body.get('search_after', [0, ''])[0]
+            hits = [
+                {'_id': str(i), '_type': 'car', '_score': None,
+                 'sort': [i, 'car#{}'.format(i)]}
+                for i in range(after + 1, min(after + 2, 3) + 1)
+            ]
+            return {'hits': {'max_score': None, 'total': 3, 'hits': hits}}
+
+        self.client.search = MagicMock(side_effect=search)
+
+        sq = self.index.search_query(doc_cls=self.index.car) \
+            .order_by(self.index.car.rank)
+        p = SearchAfterPagination(sq, per_page=2)
+        self.assertEqual(p.total, 3)
+        self.assertEqual(p.pages, 2)
+        self.assertEqual([d._id for d in p.items], ['1', '2'])
+        self.assertEqual(p.has_prev, False)
+        self.assertEqual(p.has_next, True)
+        self.assertNotIn('search_after', self.client.search.call_args[1]['body'])
+
+        p = p.next()
+        self.assertEqual(
+            self.client.search.call_args[1]['body']['search_after'], [2, 'car#2']
+        )
+        self.assertEqual(
+            self.client.search.call_args[1]['body']['sort'], ['rank', '_uid']
+        )
+        self.assertEqual([d._id for d in p.items], ['3'])
+        self.assertEqual(p.has_prev, True)
+        self.assertEqual(p.has_next, False)
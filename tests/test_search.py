@@ -1,15 +1,19 @@
+import math
 import datetime
+import threading
+from array import array
+
 from mock import Mock, MagicMock
 
 from elasticmagic import Index
 from elasticmagic import (
     Index, Document, DynamicDocument,
-    SearchQuery, Params, Term, Bool, MultiMatch,
+    SearchQuery, Params, Param, Term, Bool, Exists, MultiMatch,
     FunctionScore, Sort, QueryRescorer, agg
 )
-from elasticmagic.compiler import QueryCompiled20
+from elasticmagic.compiler import CompilationError, QueryCompiled20
 from elasticmagic.util import collect_doc_classes
-from elasticmagic.types import String, Integer, Float, Object
+from elasticmagic.types import String, Integer, Float, Date, Object
 from elasticmagic.expression import Field
 
 from .base import BaseTestCase
@@ -1033,6 +1037,447 @@ class SearchQueryTest(BaseTestCase):
         self.assertEqual(result.scroll_id, 'c2Nhbjs2OzM0NDg1ODpzRlBLc0FXNlNyNm5JWUc1')
         self.assertEqual(list(result), [])
 
+    def test_scan(self):
+        def page(scroll_id, *ids):
+            return {
+                '_scroll_id': scroll_id,
+                'hits': {
+                    'total': 5,
+                    'max_score': 0,
+                    'hits': [
+                        {'_id': str(i), '_type': 'product', '_index': 'test',
+                         '_score': 0, '_source': {'rank': i}}
+                        for i in ids
+                    ]
+                }
+            }
+
+        self.client.search = MagicMock(return_value=page('s1'))
+        self.client.scroll = MagicMock(
+            side_effect=[page('s2', 1, 2), page('s3', 3, 4), page('s4', 5), page('s5')]
+        )
+        sq = (
+            self.index.search_query(search_type='scan', routing=123)
+            .filter(self.index.product.status == 0)
+            .limit(2)
+        )
+        docs = list(sq.scan(scroll='5m'))
+        self.assertEqual([d.rank for d in docs], [1, 2, 3, 4, 5])
+        self.client.search.assert_called_once_with(
+            index='test',
+            doc_type='product',
+            body={
+                'query': {'filtered': {'filter': {'term': {'status': 0}}}},
+                'size': 2
+            },
+            search_type='scan',
+            routing=123,
+            scroll='5m',
+        )
+        self.assertEqual(
+            [c[1]['scroll_id'] for c in self.client.scroll.call_args_list],
+            ['s1', 's2', 's3', 's4']
+        )
+        self.client.clear_scroll.assert_called_once_with(scroll_id='s5')
+
+        # early exit waits prefetched page and clears the latest scroll
+        self.client.search = MagicMock(return_value=page('s1', 1, 2))
+        self.client.scroll = MagicMock(
+            side_effect=[page('s2', 3, 4), page('s3', 5), page('s4')]
+        )
+        self.client.clear_scroll.reset_mock()
+        docs = self.index.scan(self.index.search_query(), doc_type='product')
+        self.assertEqual(next(docs).rank, 1)
+        docs.close()
+        self.assertEqual(self.client.scroll.call_count, 1)
+        self.client.clear_scroll.assert_called_once_with(scroll_id='s2')
+
+        # without prefetching
+        self.client.search = MagicMock(return_value=page('s1', 1, 2))
+        self.client.scroll = MagicMock(side_effect=[page('s2')])
+        self.client.clear_scroll.reset_mock()
+        docs = self.index.search_query().scan(prefetch=False)
+        self.assertEqual([d.rank for d in docs], [1, 2])
+        self.assertEqual(self.client.search.call_args[1]['scroll'], '1m')
+        self.client.clear_scroll.assert_called_once_with(scroll_id='s2')
+
+    def test_sliced_scan(self):
+        def page(scroll_id, *ids):
+            return {
+                '_scroll_id': scroll_id,
+                'hits': {
+                    'total': 6,
+                    'max_score': 0,
+                    'hits': [
+                        {'_id': str(i), '_type': 'product', '_index': 'test',
+                         '_score': 0, '_source': {'rank': i}}
+                        for i in ids
+                    ]
+                }
+            }
+
+        # every slice has two pages of documents
+        def search(body, **params):
+            slice_id = body['slice']['id']
+            return page('{}-1'.format(slice_id), slice_id * 10 + 1, slice_id * 10 + 2)
+
+        def scroll(scroll_id, scroll):
+            slice_id, page_num = map(int, scroll_id.split('-'))
+            if page_num == 1:
+                return page('{}-2'.format(slice_id), slice_id * 10 + 3)
+            return page('{}-3'.format(slice_id))
+
+        self.client.search = MagicMock(side_effect=search)
+        self.client.scroll = MagicMock(side_effect=scroll)
+
+        sq = self.index.search_query(doc_cls=self.index.product).limit(2)
+        self.assert_expression(
+            sq.slice(1, 3),
+            {'size': 2, 'slice': {'id': 1, 'max': 3}}
+        )
+        self.assert_expression(sq.slice(1, 3).slice(None, None), {'size': 2})
+
+        docs = sq.sliced_scan(3, scroll='2m')
+        self.assertEqual(
+            sorted(d.rank for d in docs),
+            [1, 2, 3, 11, 12, 13, 21, 22, 23]
+        )
+        self.assertEqual(self.client.search.call_count, 3)
+        self.assertEqual(
+            sorted(c[1]['scroll_id'] for c in self.client.clear_scroll.call_args_list),
+            ['0-3', '1-3', '2-3']
+        )
+
+        results = sq.sliced_scan(
+            2, callback=lambda slice_sq, docs: (
+                slice_sq._slice['id'], [d.rank for d in docs]
+            )
+        )
+        self.assertEqual(results, [(0, [1, 2, 3]), (1, [11, 12, 13])])
+
+        # early exit stops all slices
+        self.client.clear_scroll.reset_mock()
+        docs = sq.sliced_scan(2, queue_size=1)
+        next(docs)
+        docs.close()
+        self.assertEqual(self.client.clear_scroll.call_count, 2)
+
+        # failed slice stops the others at once
+        scrolling = threading.Event()
+
+        def search(body, **params):
+            if body['slice']['id'] == 1:
+                self.assertTrue(scrolling.wait(5))
+                raise ValueError('slice failed')
+            return page('0-1', 1)
+
+        def scroll(scroll_id, scroll):
+            page_num = int(scroll_id.split('-')[1])
+            scrolling.set()
+            if page_num >= 1000:
+                return page('0-{}'.format(page_num + 1))
+            return page('0-{}'.format(page_num + 1), page_num + 1)
+
+        self.client.search = MagicMock(side_effect=search)
+        self.client.scroll = MagicMock(side_effect=scroll)
+        self.client.clear_scroll.reset_mock()
+        ranks = []
+        with self.assertRaises(ValueError):
+            for doc in sq.sliced_scan(2, queue_size=1):
+                ranks.append(doc.rank)
+        self.assertLess(len(ranks), 1000)
+        self.assertEqual(self.client.clear_scroll.call_count, 1)
+        self.assertLess(self.client.scroll.call_count, 1000)
+
+    def test_fingerprint(self):
+        f = DynamicDocument.fields
+
+        sq = SearchQuery().filter(f.status == 0).order_by(f.rank).limit(10)
+        fp = sq.fingerprint()
+        self.assertIs(sq.fingerprint(), fp)
+        self.assertEqual(
+            SearchQuery().limit(10).order_by(f.rank).filter(f.status == 0).fingerprint(),
+            fp
+        )
+        self.assertEqual(sq.with_routing(1).fingerprint(), fp)
+        self.assertNotEqual(sq.limit(20).fingerprint(), fp)
+        self.assertNotEqual(sq.limit(20).fingerprint(), sq.fingerprint(normalize=True))
+        self.assertEqual(
+            SearchQuery().filter(f.status == 1).order_by(f.rank).limit(20)
+            .fingerprint(normalize=True),
+            sq.fingerprint(normalize=True)
+        )
+        self.assertNotEqual(
+            SearchQuery().filter(f.status.in_([1, 2])).order_by(f.rank).limit(20)
+            .fingerprint(normalize=True),
+            sq.fingerprint(normalize=True)
+        )
+        # field names are not literals
+        self.assertNotEqual(
+            SearchQuery().filter(f.status == 0).order_by(f.price).limit(10)
+            .fingerprint(normalize=True),
+            sq.fingerprint(normalize=True)
+        )
+        self.assertNotEqual(
+            SearchQuery().filter(f.status == 0).order_by(f.rank.desc()).limit(10)
+            .fingerprint(normalize=True),
+            sq.fingerprint(normalize=True)
+        )
+        self.assertNotEqual(
+            sq.source(f.name).fingerprint(normalize=True),
+            sq.source(f.title).fingerprint(normalize=True)
+        )
+        self.assertNotEqual(
+            sq.filter(Exists(f.name)).fingerprint(normalize=True),
+            sq.filter(Exists(f.title)).fingerprint(normalize=True)
+        )
+        self.assertEqual(
+            sq.filter(f.price.range(gte=1)).search_after(5, '1')
+            .fingerprint(normalize=True),
+            sq.filter(f.price.range(gte=10)).search_after(7, '2')
+            .fingerprint(normalize=True)
+        )
+
+    def test_search_after(self):
+        sq = self.index.search_query(doc_cls=self.index.product) \
+            .order_by(self.index.product.rank.desc()) \
+            .limit(2)
+        self.assert_expression(
+            sq.search_after(5, 'product#3'),
+            {
+                'sort': [{'rank': 'desc'}],
+                'size': 2,
+                'search_after': [5, 'product#3']
+            }
+        )
+        self.assert_expression(
+            sq.search_after(5, 'product#3').search_after(None),
+            {'sort': [{'rank': 'desc'}], 'size': 2}
+        )
+
+        self.client.search = MagicMock(
+            return_value={
+                'hits': {
+                    'total': 3,
+                    'max_score': None,
+                    'hits': [
+                        {'_id': '1', '_type': 'product', '_index': 'test',
+                         '_score': None, 'sort': [7, 'product#1']},
+                        {'_id': '3', '_type': 'product', '_index': 'test',
+                         '_score': None, 'sort': [5, 'product#3']},
+                    ]
+                }
+            }
+        )
+        first_sq = sq.seek()
+        self.assert_expression(
+            first_sq,
+            {'sort': [{'rank': 'desc'}, '_uid'], 'size': 2}
+        )
+        cursor = first_sq.result.cursor
+
+        next_sq = sq.seek(cursor)
+        self.assert_expression(
+            next_sq,
+            {
+                'sort': [{'rank': 'desc'}, '_uid'],
+                'size': 2,
+                'search_after': [5, 'product#3']
+            }
+        )
+        # tiebreaker is not duplicated
+        self.assert_expression(
+            next_sq.seek(cursor, tiebreaker=self.index.product._uid),
+            {
+                'sort': [{'rank': 'desc'}, '_uid'],
+                'size': 2,
+                'search_after': [5, 'product#3']
+            }
+        )
+        self.assertRaises(ValueError, lambda: sq.seek('not a cursor'))
+
+        self.client.search = MagicMock(
+            return_value={'hits': {'total': 3, 'max_score': None, 'hits': []}}
+        )
+        self.assertIsNone(next_sq.result.cursor)
+
+    def test_lazy_hits(self):
+        self.client.search = MagicMock(
+            return_value={
+                'hits': {
+                    'hits': [
+                        {
+                            '_id': str(i),
+                            '_type': 'car',
+                            '_index': 'test',
+                            '_score': 1.0,
+                            '_source': {'vendor': 'Subaru'},
+                        }
+                        for i in range(5)
+                    ],
+                    'max_score': 1.0,
+                    'total': 5
+                },
+                'timed_out': False,
+                'took': 3
+            }
+        )
+        sq = self.index.query(doc_cls=self.index.car)
+        hits = sq.result.hits
+        self.assertEqual(sq.result.total, 5)
+        self.assertEqual(len(hits), 5)
+        self.assertEqual(hits._docs, [None] * 5)
+
+        doc = hits[1]
+        self.assertIsInstance(doc, self.index.car)
+        self.assertEqual(doc._id, '1')
+        self.assertEqual(doc.vendor, 'Subaru')
+        self.assertIs(hits[1], doc)
+        self.assertIs(hits[-4], doc)
+        self.assertIsNone(hits._docs[0])
+        self.assertRaises(IndexError, lambda: hits[5])
+        self.assertRaises(IndexError, lambda: hits[-6])
+
+        self.assertEqual([d._id for d in hits[:2]], ['0', '1'])
+        self.assertIs(hits[:2][1], doc)
+        self.assertEqual([d._id for d in hits[::-2]], ['4', '2', '0'])
+        self.assertIsNone(hits._docs[3])
+
+        self.assertEqual([d._id for d in sq], ['0', '1', '2', '3', '4'])
+        self.assertIs(list(sq.result)[1], doc)
+
+        docs = list(hits)
+        self.assertEqual(hits, docs)
+        self.assertEqual(docs, hits)
+        self.assertEqual(hits, tuple(docs))
+        self.assertNotEqual(hits, docs[:2])
+        self.assertNotEqual(hits, None)
+        self.assertEqual(hits + [], docs)
+        self.assertEqual([] + hits, docs)
+        self.assertEqual(hits.index(doc), 1)
+        self.assertEqual(hits.count(doc), 1)
+        self.assertIn(doc, hits)
+        self.assertEqual(list(reversed(hits)), docs[::-1])
+        self.assertEqual(repr(hits), '<LazyHits {!r}>'.format(docs))
+
+    def test_hits_to_columns(self):
+        class ProductDocument(Document):
+            __doc_type__ = 'product'
+
+            name = Field(String)
+            price = Field(Float)
+            rank = Field(Integer)
+            created = Field(Date)
+            seller = Field(Object(Document))
+
+        self.client.search = MagicMock(
+            return_value={
+                'hits': {
+                    'hits': [
+                        {
+                            '_id': '1',
+                            '_type': 'product',
+                            '_index': 'test',
+                            '_score': 2.5,
+                            '_source': {
+                                'name': 'Lego', 'price': 10, 'rank': 3,
+                                'created': '2017-01-02T03:04:05',
+                                'seller': {'city': 'Paris'},
+                            },
+                        },
+                        {
+                            '_id': '2',
+                            '_type': 'product',
+                            '_index': 'test',
+                            '_score': None,
+                            '_source': {'name': 'Duplo', 'rank': 5},
+                        },
+                    ],
+                    'max_score': 2.5,
+                    'total': 2
+                },
+                'timed_out': False,
+                'took': 3
+            }
+        )
+        sq = self.index.query(doc_cls=ProductDocument)
+        columns = sq.result.to_columns(
+            [
+                '_id', '_score', ProductDocument.name, ProductDocument.price,
+                'rank', 'created', 'seller.city', 'unknown',
+            ],
+            use_numpy=False,
+        )
+        self.assertEqual(sq.result.hits._docs, [None, None])
+        self.assertEqual(columns['_id'], ['1', '2'])
+        self.assertIsInstance(columns['_score'], array)
+        self.assertEqual(columns['_score'][0], 2.5)
+        self.assertTrue(math.isnan(columns['_score'][1]))
+        self.assertEqual(columns['name'], ['Lego', 'Duplo'])
+        self.assertEqual(columns['price'].typecode, 'd')
+        self.assertEqual(columns['price'][0], 10.0)
+        self.assertTrue(math.isnan(columns['price'][1]))
+        self.assertIsInstance(columns['rank'], array)
+        self.assertEqual(list(columns['rank']), [3, 5])
+        self.assertEqual(
+            columns['created'], [datetime.datetime(2017, 1, 2, 3, 4, 5), None]
+        )
+        self.assertEqual(columns['seller.city'], ['Paris', None])
+        self.assertEqual(columns['unknown'], [None, None])
+
+    def test_prefetch_instances(self):
+        self.client.search = MagicMock(
+            return_value={
+                'hits': {
+                    'hits': [
+                        {'_id': '1', '_type': 'car', '_index': 'test', '_score': 1.0},
+                        {'_id': '2', '_type': 'car', '_index': 'test', '_score': 1.0},
+                    ],
+                    'max_score': 1.0,
+                    'total': 2
+                },
+                'aggregations': {
+                    'vendors': {
+                        'buckets': [
+                            {'key': 'subaru', 'doc_count': 2},
+                        ]
+                    }
+                }
+            }
+        )
+        cars_loaded = threading.Event()
+
+        def load_cars(ids):
+            cars_loaded.set()
+            return {id: 'car {}'.format(id) for id in ids}
+
+        def load_vendors(keys):
+            # would deadlock if mappers were called one after another
+            self.assertTrue(cars_loaded.wait(5))
+            return {key: key.title() for key in keys}
+
+        car_mapper = Mock(side_effect=load_cars)
+        vendor_mapper = Mock(side_effect=load_vendors)
+        sq = (
+            self.index.query(doc_cls=self.index.car)
+            .with_instance_mapper(car_mapper)
+            .aggs({
+                'vendors': agg.Terms(
+                    self.index.car.vendor, instance_mapper=vendor_mapper
+                )
+            })
+        )
+        sq.result.prefetch_instances()
+        self.assertEqual(car_mapper.call_count, 1)
+        self.assertEqual(vendor_mapper.call_count, 1)
+        self.assertEqual([d.instance for d in sq.result.hits], ['car 1', 'car 2'])
+        vendors = sq.result.get_aggregation('vendors')
+        self.assertEqual(vendors.buckets[0].instance, 'Subaru')
+
+        sq.result.prefetch_instances()
+        self.assertEqual(car_mapper.call_count, 1)
+        self.assertEqual(vendor_mapper.call_count, 1)
+
     def test_delete(self):
         self.index.query(self.index.car.vendor == 'Focus').delete()
         self.client.delete_by_query.assert_called_with(
@@ -1073,6 +1518,163 @@ class SearchQueryTest(BaseTestCase):
         self.assertFalse(self.client.count.called)
         self.assertFalse(self.client.search.called)
 
+    def test_compiled_params_cache(self):
+        f = DynamicDocument.fields
+
+        sq = SearchQuery(f.name.match('Subaru')).filter(f.status == 0)
+        params = sq._compiled_params
+        self.assertIs(sq._compiled_params, params)
+        self.assertEqual(sq.to_dict(), params)
+        self.assertIsNot(sq.to_dict(), params)
+        # without compiled cache only top level dict is copied
+        self.assertIs(sq.to_dict()['query'], params['query'])
+        body = sq.to_dict()
+        body['size'] = 0
+        self.assertNotIn('size', sq.to_dict())
+        self.assertIs(sq.get_context(), sq.get_context())
+        self.assertIsNot(sq.get_context(QueryCompiled20), sq.get_context())
+
+        sq2 = sq.limit(10)
+        self.assertIsNot(sq2._compiled_params, params)
+        self.assertEqual(sq2.to_dict(), dict(params, size=10))
+        self.assertIsNot(sq2.get_context(), sq.get_context())
+        self.assertEqual(sq[10:20].to_dict(), dict(params, size=10, **{'from': 10}))
+
+        self.assertIsNot(
+            SearchQuery(f.name.match('Subaru')).filter(f.status == 0)._compiled_params,
+            params
+        )
+
+    def test_compiled_cache(self):
+        from elasticmagic.datastructures import LRUCache
+
+        f = DynamicDocument.fields
+
+        SearchQuery.compiled_cache = LRUCache(maxsize=2)
+        try:
+            params = (
+                self.index.query(f.name.match('Subaru'))
+                .filter(f.status == 0)
+                ._compiled_params
+            )
+            self.assertIs(
+                SearchQuery(f.name.match('Subaru')).filter(f.status == 0)._compiled_params,
+                params
+            )
+            self.assertIs(
+                SearchQuery(f.name.match('Subaru'), routing=123)
+                .filter(f.status == 0)
+                ._compiled_params,
+                params
+            )
+            self.assertIsNot(
+                SearchQuery(f.name.match('Subaru')).filter(f.status == False)._compiled_params,
+                params
+            )
+            self.assertEqual(
+                SearchQuery(f.name.match('Subaru')).filter(f.status == 1).to_dict(),
+                {
+                    'query': {
+                        'filtered': {
+                            'query': {'match': {'name': 'Subaru'}},
+                            'filter': {'term': {'status': 1}}
+                        }
+                    }
+                }
+            )
+            self.assertIsNot(
+                SearchQuery(f.name.match('Subaru'), _compiler=QueryCompiled20)
+                .filter(f.status == 0)
+                ._compiled_params,
+                params
+            )
+            self.assertEqual(len(SearchQuery.compiled_cache), 2)
+
+            # returned body can be modified without affecting cached one
+            sq = SearchQuery(f.name.match('Subaru')).filter(f.status == 0)
+            body = sq.to_dict()
+            body['size'] = 0
+            body['query']['filtered']['filter']['term']['status'] = 1
+            expected = {
+                'query': {
+                    'filtered': {
+                        'query': {'match': {'name': 'Subaru'}},
+                        'filter': {'term': {'status': 0}}
+                    }
+                }
+            }
+            self.assertEqual(sq.to_dict(), expected)
+            self.assertEqual(
+                SearchQuery(f.name.match('Subaru')).filter(f.status == 0).to_dict(),
+                expected
+            )
+            self.assertEqual(params, expected)
+
+            # unhashable values are compiled without cache
+            sq = SearchQuery(f.tags.in_([{'a'}]))
+            self.assertEqual(sq.to_dict(), {'query': {'terms': {'tags': [{'a'}]}}})
+        finally:
+            SearchQuery.compiled_cache = None
+
+    def test_template(self):
+        f = DynamicDocument.fields
+
+        sq = (
+            SearchQuery(f.name.match(Param('name')), _compiler=QueryCompiled20)
+            .filter(f.user_id == Param('user_id'))
+            .filter(f.category.in_(Param('categories')))
+            .filter(f.price.range(gte=Param('min_price', default=0)))
+            .order_by(f.rank.desc())
+            .limit(Param('size', default=10))
+        )
+        template = sq.to_template()
+        self.assertEqual(
+            template.param_names,
+            {'name', 'user_id', 'categories', 'min_price', 'size'}
+        )
+        body = template.bind(name='Subaru', user_id=123, categories=[1, 2], size=20)
+        self.assertEqual(
+            body,
+            {
+                "query": {
+                    "bool": {
+                        "must": {"match": {"name": "Subaru"}},
+                        "filter": {
+                            "bool": {
+                                "must": [
+                                    {"term": {"user_id": 123}},
+                                    {"terms": {"category": [1, 2]}},
+                                    {"range": {"price": {"gte": 0}}}
+                                ]
+                            }
+                        }
+                    }
+                },
+                "sort": [{"rank": "desc"}],
+                "size": 20
+            }
+        )
+        body2 = template.bind(name='Impreza', user_id=456, categories=[3], min_price=100)
+        self.assertEqual(body2['query']['bool']['must'], {"match": {"name": "Impreza"}})
+        self.assertEqual(
+            body2['query']['bool']['filter']['bool']['must'][2],
+            {"range": {"price": {"gte": 100}}}
+        )
+        self.assertEqual(body2['size'], 10)
+        # parts without parameters are shared
+        self.assertIs(body2['sort'], body['sort'])
+        self.assertIs(body['sort'], template.params['sort'])
+        self.assertEqual(body['query']['bool']['must'], {"match": {"name": "Subaru"}})
+
+        self.assertRaises(CompilationError, template.bind, name='Subaru')
+
+        template = SearchQuery(f.user_id == 1).to_template()
+        body = template.bind()
+        self.assertEqual(body, template.params)
+        self.assertIsNot(body, template.params)
+        body['query']['term']['user_id'] = 2
+        self.assertEqual(template.bind(), {'query': {'term': {'user_id': 1}}})
+
     def test_search_params(self):
         sq = SearchQuery()
         self.assertEqual(
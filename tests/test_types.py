@@ -2,6 +2,8 @@ import binascii
 import datetime
 import unittest
 
+import dateutil.tz
+
 from elasticmagic.compat import PY2
 from elasticmagic.document import DynamicDocument
 from elasticmagic.types import (
@@ -125,6 +127,41 @@ class TypesTestCase(unittest.TestCase):
             t.to_python('2009-11-15T14:12:12'),
             datetime.datetime(2009, 11, 15, 14, 12, 12)
         )
+        self.assertEqual(
+            t.to_python('2009-11-15'),
+            datetime.datetime(2009, 11, 15)
+        )
+        self.assertEqual(
+            t.to_python('2009-11-15T14:12'),
+            datetime.datetime(2009, 11, 15, 14, 12)
+        )
+        self.assertEqual(
+            t.to_python('2009-11-15T14:12:12.123456789Z'),
+            datetime.datetime(2009, 11, 15, 14, 12, 12, 123456, dateutil.tz.tzutc())
+        )
+        self.assertEqual(
+            t.to_python('2009-11-15T14:12:12.5+02:00'),
+            datetime.datetime(2009, 11, 15, 14, 12, 12, 500000, dateutil.tz.tzoffset(None, 7200))
+        )
+        self.assertEqual(
+            t.to_python('2009-11-15T14:12:12-0530'),
+            datetime.datetime(2009, 11, 15, 14, 12, 12, 0, dateutil.tz.tzoffset(None, -19800))
+        )
+        self.assertEqual(
+            t.to_python(1258294332000),
+            datetime.datetime(2009, 11, 15, 14, 12, 12, 0, dateutil.tz.tzutc())
+        )
+        self.assertEqual(
+            t.to_python('Nov 15 2009 14:12:12'),
+            datetime.datetime(2009, 11, 15, 14, 12, 12)
+        )
+        # only exact matches are parsed by fast path
+        self.assertIsNone(t._parse_iso_datetime('2009-11-15\n'))
+        self.assertEqual(t.to_python('2009-11-15\n'), datetime.datetime(2009, 11, 15))
+        # epoch millis are in UTC, strings without offset are naive
+        self.assertEqual(t.to_python(1258294332000).tzinfo, dateutil.tz.tzutc())
+        self.assertIsNone(t.to_python('2009-11-15T14:12:12').tzinfo)
+        self.assertRaises(ValueError, lambda: t.to_python('2009-02-30'))
         self.assertRaises(ValueError, lambda: t.to_python('test'))
         self.assertRaises(ValueError, lambda: t.from_python('test'))
         self.assertRaises(ValidationError, lambda: t.from_python('test', validate=True))